@@ -0,0 +1,117 @@
+from dataclasses import dataclass, field
+
+from sqlalchemy import text
+
+# Uniones de la tabla de hechos (alias f) con cada dimensión, por alias
+DIMENSION_JOINS = {
+    'd': "JOIN dim_date d ON d.date_key = f.date_key",
+    'p': "JOIN dim_product p ON p.product_key = f.product_key",
+    'l': "JOIN dim_location l ON l.location_key = f.location_key",
+    's': "JOIN dim_supplier s ON s.supplier_key = f.supplier_key",
+}
+
+# Columna de período de cada granularidad y su expresión sobre date_key (YYYYMMDD)
+PERIODS = {
+    'day': ('date_key', "f.date_key"),
+    'month': ('month_key', "f.date_key / 100"),
+}
+
+
+@dataclass
+class Aggregate:
+    """
+    Tabla agregada sobre la estrella: columnas de agrupación y medidas como
+    expresiones SQL sobre f (hechos) y los alias de DIMENSION_JOINS, más la
+    granularidad del período ('day' o 'month') por la que se refresca
+    """
+    name: str
+    period: str
+    group_by: dict = field(default_factory=dict)
+    measures: dict = field(default_factory=dict)
+
+    @property
+    def period_column(self):
+        return PERIODS[self.period][0]
+
+    def query(self, where=''):
+        period_column, period_expression = PERIODS[self.period]
+        groups = {period_column: period_expression, **self.group_by}
+        expressions = list(groups.values()) + list(self.measures.values())
+        # Solo se unen las dimensiones que usa alguna expresión
+        joins = [join for alias, join in DIMENSION_JOINS.items()
+                 if any(f"{alias}." in expression for expression in expressions)]
+
+        select = ', '.join(f"{expression} AS {column}"
+                           for column, expression in {**groups, **self.measures}.items())
+        return (f"SELECT {select} FROM fact_inventory f {' '.join(joins)} {where} "
+                f"GROUP BY {', '.join(groups.values())}")
+
+
+DEFAULT_AGGREGATES = [
+    # Valor de stock mensual por categoría y ciudad
+    Aggregate(
+        'agg_monthly_stock_by_category_city', 'month',
+        group_by={'category': "p.category", 'city': "l.city"},
+        measures={
+            'total_value': "SUM(f.total_value)",
+            'quantity_on_hand': "SUM(f.quantity_on_hand)",
+            'records': "COUNT(*)",
+        },
+    ),
+    # Unidades vendidas y recibidas por día y proveedor
+    Aggregate(
+        'agg_daily_units_by_supplier', 'day',
+        group_by={'supplier_id': "s.supplier_id", 'supplier_name': "s.supplier_name"},
+        measures={
+            'units_sold': "SUM(f.units_sold)",
+            'units_received': "SUM(f.units_received)",
+        },
+    ),
+]
+
+
+def ensure_aggregate_table(conn, aggregate):
+    """
+    Crea la tabla agregada (vacía, con los tipos de su consulta) si no existe
+    """
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS {aggregate.name} AS {aggregate.query()} WITH NO DATA"))
+    conn.execute(text(
+        f"CREATE INDEX IF NOT EXISTS {aggregate.name}_period_idx "
+        f"ON {aggregate.name} ({aggregate.period_column})"
+    ))
+
+
+def refresh_aggregate(conn, aggregate, date_keys=None):
+    """
+    Recalcula, dentro de la transacción de conn, las filas de la tabla agregada de
+    los períodos que contienen date_keys, o la tabla completa si date_keys es None.
+    Solo se leen los hechos de esos períodos; el filtro por rango de date_key
+    permite descartar las particiones del resto. Devuelve las filas escritas
+    """
+    ensure_aggregate_table(conn, aggregate)
+    _, period_expression = PERIODS[aggregate.period]
+
+    if date_keys is None:
+        conn.execute(text(f"DELETE FROM {aggregate.name}"))
+        where, params = '', {}
+    else:
+        keys = sorted({int(key) for key in date_keys})
+        if not keys:
+            return 0
+        periods = keys if aggregate.period == 'day' else sorted({key // 100 for key in keys})
+        if aggregate.period == 'month':
+            first, last = periods[0] * 100 + 1, periods[-1] * 100 + 31
+        else:
+            first, last = periods[0], periods[-1]
+
+        conn.execute(
+            text(f"DELETE FROM {aggregate.name} WHERE {aggregate.period_column} = ANY(:periods)"),
+            {'periods': periods}
+        )
+        where = f"WHERE f.date_key BETWEEN :first AND :last AND {period_expression} = ANY(:periods)"
+        params = {'first': first, 'last': last, 'periods': periods}
+
+    columns = ', '.join([aggregate.period_column, *aggregate.group_by, *aggregate.measures])
+    return conn.execute(
+        text(f"INSERT INTO {aggregate.name} ({columns}) {aggregate.query(where)}"), params
+    ).rowcount
@@ -0,0 +1,61 @@
+import argparse
+import timeit
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from transforms import date_keys
+
+
+def strftime_date_keys(dates):
+    """
+    Cálculo anterior de date_key: formatear a cadena y volver a parsear
+    """
+    return pd.to_datetime(dates).dt.strftime('%Y%m%d').astype(int)
+
+
+def sample_dates(rows, seed=42):
+    """
+    Genera fechas como las devuelve psycopg2 para columnas DATE (objetos date)
+    """
+    rng = np.random.default_rng(seed)
+    days = np.datetime64('2023-01-01') + rng.integers(0, 365, size=rows)
+    return pd.Series([date.fromisoformat(str(day)) for day in days], dtype=object)
+
+
+def run_benchmark(rows, repeat):
+    dates = sample_dates(rows)
+    timestamps = pd.to_datetime(dates)
+
+    # Ambos caminos deben producir exactamente las mismas claves
+    assert np.array_equal(strftime_date_keys(dates).to_numpy(), date_keys(dates))
+
+    cases = {
+        'strftime (objetos date)': lambda: strftime_date_keys(dates),
+        'aritmética (objetos date)': lambda: date_keys(dates),
+        'strftime (datetime64)': lambda: timestamps.dt.strftime('%Y%m%d').astype(int),
+        'aritmética (datetime64)': lambda: date_keys(timestamps),
+    }
+
+    results = {}
+    for name, func in cases.items():
+        results[name] = min(timeit.repeat(func, number=1, repeat=repeat))
+
+    print(f"date_key para {rows:,} filas (mejor de {repeat}):")
+    for name, seconds in results.items():
+        print(f"  {name:<28} {seconds * 1000:10.1f} ms")
+
+    print(f"Aceleración con objetos date: "
+          f"{results['strftime (objetos date)'] / results['aritmética (objetos date)']:.1f}x")
+    print(f"Aceleración con datetime64:   "
+          f"{results['strftime (datetime64)'] / results['aritmética (datetime64)']:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-benchmark del cálculo de date_key")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    run_benchmark(args.rows, args.repeat)
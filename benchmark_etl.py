@@ -0,0 +1,202 @@
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import logging
+import platform
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+from extraction import EXTRACT_BACKENDS
+from instrumentation import current_rss
+from script1 import InventoryETLSetup
+
+# Fase del benchmark a la que pertenece cada etapa del ETL
+STAGE_PHASES = {
+    'extract_source_data': 'extract',
+    'compact_source_data': 'transform',
+    'transform_date_dimension': 'transform',
+    'transform_dimensions': 'transform',
+    'transform_facts': 'transform',
+    'load_dimensions': 'load',
+    'load_facts': 'load',
+    'refresh_aggregates': 'load',
+    'validate_data': 'validate',
+    'reconcile_data': 'validate',
+}
+PHASES = ['extract', 'transform', 'load', 'validate']
+
+
+class PeakRSSSampler:
+    """
+    Mide el pico de memoria residente durante un bloque muestreando en un hilo
+    """
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, current_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak = current_rss()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss())
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def seed_source_data(scale_factor, seed):
+    """
+    Genera los datos fuente con InventoryETLSetup y devuelve el número de registros
+    """
+    setup = InventoryETLSetup(scale_factor=scale_factor, seed=seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        setup.run_setup()
+    with setup.engine.connect() as conn:
+        return conn.execute(text("SELECT COUNT(*) FROM source_inventory")).scalar()
+
+
+def run_variant(variant, source_rows, etl_options):
+    """
+    Ejecuta las etapas de una variante en su orden y acumula por fase el tiempo,
+    las filas/s (sobre los registros de source_inventory) y el pico de memoria
+    """
+    module = importlib.import_module(variant)
+    etl = module.InventoryETL(**etl_options)
+
+    phases = {phase: {'seconds': 0.0, 'peak_rss_mb': 0.0} for phase in PHASES}
+    for stage in etl.STAGES:
+        phase = phases[STAGE_PHASES[stage]]
+        with PeakRSSSampler() as sampler:
+            start = time.perf_counter()
+            getattr(etl, stage)()
+            phase['seconds'] += time.perf_counter() - start
+        phase['peak_rss_mb'] = max(phase['peak_rss_mb'], sampler.peak / 2**20)
+
+    for phase in phases.values():
+        phase['rows_per_second'] = source_rows / phase['seconds'] if phase['seconds'] else None
+
+    etl.engine.dispose()
+    return {
+        'variant': variant,
+        'phases': phases,
+        'total_seconds': sum(phase['seconds'] for phase in phases.values()),
+    }
+
+
+def compare_results(results, baseline, tolerance):
+    """
+    Compara los tiempos por fase con un resultado anterior y devuelve las regresiones
+    """
+    previous = {
+        (run['variant'], run['scale_factor'], phase): values['seconds']
+        for run in baseline['runs']
+        for phase, values in run['phases'].items()
+    }
+
+    regressions = []
+    for run in results['runs']:
+        for phase, values in run['phases'].items():
+            before = previous.get((run['variant'], run['scale_factor'], phase))
+            if before and values['seconds'] > before * (1 + tolerance):
+                regressions.append(
+                    f"{run['variant']} SF={run['scale_factor']} {phase}: "
+                    f"{before:.2f}s -> {values['seconds']:.2f}s"
+                )
+    return regressions
+
+
+def run_benchmark(scale_factors, variants, seed, etl_options):
+    results = {
+        'commit': git_commit(),
+        'timestamp': datetime.now(timezone.utc).isoformat(),
+        'host': platform.node(),
+        'python': platform.python_version(),
+        'seed': seed,
+        'etl_options': etl_options,
+        'runs': [],
+    }
+
+    for scale_factor in scale_factors:
+        print(f"Generando datos con factor de escala {scale_factor}...")
+        source_rows = seed_source_data(scale_factor, seed)
+
+        for variant in variants:
+            run = run_variant(variant, source_rows, etl_options)
+            run.update(scale_factor=scale_factor, source_rows=source_rows)
+            results['runs'].append(run)
+
+            summary = ', '.join(
+                f"{phase} {values['seconds']:.2f}s" for phase, values in run['phases'].items()
+            )
+            print(f"  {variant}: {run['total_seconds']:.2f}s ({summary})")
+
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de extremo a extremo de las variantes del ETL")
+    parser.add_argument('--scale-factors', type=float, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--variants', nargs='+', default=['etl1', 'etl2', 'etl3'])
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--chunk-size', type=int, default=None)
+    parser.add_argument('--extract-workers', type=int, default=4)
+    parser.add_argument('--transform-workers', type=int, default=1)
+    parser.add_argument('--extract-backend', choices=sorted(EXTRACT_BACKENDS), default='sql')
+    parser.add_argument('--elt', action='store_true', help="Transforma y carga los hechos dentro de PostgreSQL")
+    parser.add_argument('--output', default='benchmark_results.json',
+                        help="Archivo JSON donde guardar los resultados")
+    parser.add_argument('--baseline', default=None,
+                        help="Resultados JSON anteriores con los que comparar")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Aumento relativo de tiempo por fase considerado regresión")
+    parser.add_argument('--verbose', action='store_true', help="Muestra la salida del ETL")
+    args = parser.parse_args()
+
+    # La salida del ETL se emite por logging; sin --verbose solo se ven los avisos
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format='%(message)s')
+
+    etl_options = {
+        'chunk_size': args.chunk_size,
+        'extract_workers': args.extract_workers,
+        'transform_workers': args.transform_workers,
+        'extract_backend': args.extract_backend,
+        'elt': args.elt,
+    }
+    results = run_benchmark(args.scale_factors, args.variants, args.seed, etl_options)
+
+    with open(args.output, 'w') as output:
+        json.dump(results, output, indent=2)
+    print(f"Resultados guardados en {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = compare_results(results, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"✗ Regresión: {regression}")
+        if regressions:
+            sys.exit(1)
+        print("✓ Sin regresiones respecto a la línea base")
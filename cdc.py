@@ -0,0 +1,209 @@
+import struct
+from dataclasses import dataclass, field
+from datetime import date
+
+import pandas as pd
+from sqlalchemy import text
+
+
+# Slot de replicación lógica y publicación de las tablas fuente. Se usa pgoutput,
+# el plugin incluido en PostgreSQL, a través de las funciones SQL de decodificación
+CDC_SLOT = 'inventory_etl_cdc'
+CDC_PUBLICATION = 'inventory_etl_cdc'
+
+# Tablas fuente capturadas y su clave primaria
+CDC_KEYS = {
+    'source_products': 'product_id',
+    'source_stores': 'location_id',
+    'source_suppliers': 'supplier_id',
+    'source_inventory': 'inventory_id',
+}
+
+# Conversión del valor en texto de cada columna según el OID de su tipo, a los
+# mismos tipos Python que devuelve pd.read_sql; el resto queda como texto
+VALUE_PARSERS = {
+    16: lambda value: value == 't',
+    20: int, 21: int, 23: int,
+    700: float, 701: float, 1700: float,
+    1082: date.fromisoformat,
+}
+
+# Valor TOAST que no cambió: pgoutput no lo envía y se relee de la fuente
+UNCHANGED = object()
+
+
+def ensure_slot(conn):
+    """
+    Prepara la captura de cambios si aún no existe: publicación de las tablas fuente
+    (sin TRUNCATE, que requiere una carga completa) y el slot. La publicación se
+    confirma antes de crear el slot, que no admite una transacción con escrituras.
+    Devuelve True si creó el slot
+    """
+    if not conn.execute(text("SELECT 1 FROM pg_publication WHERE pubname = :name"),
+                        {'name': CDC_PUBLICATION}).first():
+        conn.execute(text(
+            f"CREATE PUBLICATION {CDC_PUBLICATION} FOR TABLE {', '.join(CDC_KEYS)} "
+            f"WITH (publish = 'insert, update, delete')"
+        ))
+    conn.commit()
+
+    if conn.execute(text("SELECT 1 FROM pg_replication_slots WHERE slot_name = :slot"),
+                    {'slot': CDC_SLOT}).first():
+        return False
+    conn.execute(text("SELECT pg_create_logical_replication_slot(:slot, 'pgoutput')"), {'slot': CDC_SLOT})
+    return True
+
+
+@dataclass
+class Change:
+    """
+    Un cambio de una fila: operación ('I', 'U' o 'D') y sus valores anterior y
+    nuevo por columna (None si no aplica o la identidad de réplica no lo incluye)
+    """
+    table: str
+    operation: str
+    old: dict = None
+    new: dict = None
+
+
+@dataclass
+class TableChanges:
+    """
+    Cambios de un lote en una tabla, condensados por clave: el estado final de las
+    filas insertadas o actualizadas y las claves borradas
+    """
+    upserts: pd.DataFrame
+    deleted: list
+
+    def __len__(self):
+        return len(self.upserts) + len(self.deleted)
+
+
+@dataclass
+class ChangeBatch:
+    """
+    Micro-lote de transacciones completas leídas del slot; lsn es el final del
+    último COMMIT, hasta donde se avanza el slot una vez aplicado
+    """
+    lsn: str = None
+    changes: list = field(default_factory=list)
+
+    def table_changes(self, table):
+        key = CDC_KEYS[table]
+        final = {}
+        for change in self.changes:
+            if change.table != table:
+                continue
+            if change.old is not None:
+                final[change.old[key]] = None
+            if change.new is not None:
+                final.pop(change.new[key], None)
+                final[change.new[key]] = change.new
+
+        return TableChanges(
+            pd.DataFrame([row for row in final.values() if row is not None]),
+            [row_key for row_key, row in final.items() if row is None],
+        )
+
+
+def _string(data, offset):
+    end = data.index(b'\0', offset)
+    return data[offset:end].decode(), end + 1
+
+
+def _tuple(data, offset, columns):
+    """
+    Decodifica un TupleData de pgoutput: por columna 'n' (nulo), 'u' (TOAST sin
+    cambios) o 't' seguido del largo y el valor en texto
+    """
+    count, = struct.unpack_from('!h', data, offset)
+    offset += 2
+    values = {}
+    for name, parse in columns[:count]:
+        kind = data[offset:offset + 1]
+        offset += 1
+        if kind == b't':
+            length, = struct.unpack_from('!i', data, offset)
+            values[name] = parse(data[offset + 4:offset + 4 + length].decode())
+            offset += 4 + length
+        else:
+            values[name] = None if kind == b'n' else UNCHANGED
+    return values, offset
+
+
+def _decode(rows):
+    """
+    Decodifica los mensajes del protocolo lógico de pgoutput (versión 1) en un
+    ChangeBatch: 'R' describe una tabla, 'I', 'U' y 'D' son cambios de filas y 'C'
+    cierra una transacción; el resto (BEGIN, tipos, origen) se ignora
+    """
+    batch = ChangeBatch()
+    relations = {}
+    for lsn, data in rows:
+        data = bytes(data)
+        kind = data[:1]
+        if kind == b'R':
+            relation_id, = struct.unpack_from('!I', data, 1)
+            _, offset = _string(data, 5)
+            table, offset = _string(data, offset)
+            count, = struct.unpack_from('!h', data, offset + 1)
+            offset += 3
+            columns = []
+            for _ in range(count):
+                name, offset = _string(data, offset + 1)
+                type_oid, = struct.unpack_from('!I', data, offset)
+                offset += 8
+                columns.append((name, VALUE_PARSERS.get(type_oid, str)))
+            relations[relation_id] = (table, columns)
+        elif kind in (b'I', b'U', b'D'):
+            relation_id, = struct.unpack_from('!I', data, 1)
+            table, columns = relations[relation_id]
+            change = Change(table, kind.decode())
+            marker, offset = data[5:6], 6
+            # Registro anterior: solo la clave ('K') o completo ('O')
+            if marker in (b'K', b'O'):
+                change.old, offset = _tuple(data, offset, columns)
+                marker, offset = data[offset:offset + 1], offset + 1
+            if marker == b'N':
+                change.new, offset = _tuple(data, offset, columns)
+            batch.changes.append(change)
+        elif kind == b'C':
+            batch.lsn = lsn
+    return batch
+
+
+def read_changes(conn, max_changes):
+    """
+    Lee del slot, sin consumirlas, las transacciones completas pendientes hasta
+    reunir unos max_changes mensajes. Los valores TOAST sin cambios se releen de la
+    tabla fuente
+    """
+    rows = conn.execute(text(
+        "SELECT lsn, data FROM pg_logical_slot_peek_binary_changes(:slot, NULL, :limit, "
+        "'proto_version', '1', 'publication_names', :publication)"
+    ), {'slot': CDC_SLOT, 'limit': max_changes, 'publication': CDC_PUBLICATION}).all()
+    batch = _decode(rows)
+
+    for table, key in CDC_KEYS.items():
+        unchanged = [change.new for change in batch.changes if change.table == table and change.new
+                     and any(value is UNCHANGED for value in change.new.values())]
+        if not unchanged:
+            continue
+        current = pd.read_sql(
+            text(f"SELECT * FROM {table} WHERE {key} = ANY(:keys)"), conn,
+            params={'keys': [row[key] for row in unchanged]}
+        ).set_index(key)
+        for row in unchanged:
+            for column, value in row.items():
+                if value is UNCHANGED:
+                    row[column] = current.at[row[key], column] if row[key] in current.index else None
+    return batch
+
+
+def advance_slot(conn, lsn):
+    """
+    Marca como consumidos los cambios del slot hasta lsn, una vez aplicados
+    """
+    conn.execute(text("SELECT pg_replication_slot_advance(:slot, CAST(:lsn AS pg_lsn))"),
+                 {'slot': CDC_SLOT, 'lsn': lsn})
+
@@ -0,0 +1,169 @@
+import json
+import os
+import pickle
+from datetime import datetime, timezone
+from types import GeneratorType
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as pa_feather
+except ImportError:  # pyarrow es opcional: sin él los DataFrames se guardan con pickle
+    pa = None
+
+MANIFEST_FILE = 'manifest.json'
+
+
+class RunCheckpoint:
+    """
+    Checkpoint de una ejecución de run_etl en un directorio: manifest.json con la
+    variante, las opciones y las etapas completadas, y un archivo por salida de
+    cada etapa (DataFrames en formato Arrow IPC, el resto con pickle). Solo se
+    borran esos archivos: el directorio puede contener otros y se elimina
+    únicamente si queda vacío
+    """
+
+    def __init__(self, directory, variant, options):
+        self.directory = directory
+        self.variant = variant
+        self.options = options
+        self.manifest = None
+
+    @property
+    def run_id(self):
+        return self.manifest['run_id']
+
+    @property
+    def completed(self):
+        return self.manifest['completed'] if self.manifest else []
+
+    @property
+    def progress_key(self):
+        """
+        Fila de etl_state con el último inventory_id confirmado por load_facts
+        """
+        return f"load_facts:{self.run_id}"
+
+    def start(self, run_id):
+        """
+        Empieza un checkpoint nuevo, descartando el anterior
+        """
+        self._remove_files()
+        os.makedirs(self.directory, exist_ok=True)
+        self.manifest = {
+            'variant': self.variant,
+            'run_id': run_id,
+            'options': self.options,
+            'started_at': datetime.now(timezone.utc).isoformat(),
+            'completed': [],
+            'outputs': {},
+        }
+        self._write_manifest()
+
+    def resume(self):
+        """
+        Lee el checkpoint de la ejecución anterior y devuelve las salidas de sus
+        etapas completadas ({atributo: valor}; si dos etapas producen el mismo
+        atributo manda la posterior), o None si no hay checkpoint
+        """
+        manifest = self._read_manifest()
+        if manifest is None:
+            return None
+        if manifest['variant'] != self.variant or manifest['options'] != self.options:
+            raise ValueError(
+                f"El checkpoint de {self.directory} es de {manifest['variant']} con opciones "
+                f"{manifest['options']}; no se puede retomar con {self.variant} y {self.options}"
+            )
+
+        self.manifest = manifest
+        state = {}
+        for stage in manifest['completed']:
+            for name, filename in manifest['outputs'][stage].items():
+                state[name] = self._read(filename)
+        return state
+
+    def save_stage(self, stage, outputs):
+        """
+        Guarda las salidas de una etapa ({atributo: valor}) y la marca como
+        completada. Si alguna es un generador (hechos que se transforman durante
+        la carga) la etapa queda pendiente y se repite al retomar
+        """
+        if any(isinstance(value, GeneratorType) for value in outputs.values()):
+            return False
+        self.manifest['outputs'][stage] = {
+            name: self._write(f"{stage}.{name}", value) for name, value in outputs.items()
+        }
+        self.manifest['completed'].append(stage)
+        self._write_manifest()
+        return True
+
+    def finish(self):
+        """
+        Elimina el checkpoint de una ejecución que terminó
+        """
+        self._remove_files()
+        try:
+            os.rmdir(self.directory)
+        except OSError:
+            # No existe o tiene otros archivos, que no son del checkpoint
+            pass
+
+    def _read_manifest(self):
+        """
+        Lee el manifest del directorio, o None si no hay; un manifest.json que no es
+        de un checkpoint se rechaza en lugar de sobrescribirlo
+        """
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        if not os.path.exists(path):
+            return None
+        with open(path) as manifest_file:
+            manifest = json.load(manifest_file)
+        if not isinstance(manifest, dict) or not {'variant', 'run_id', 'completed', 'outputs'} <= manifest.keys():
+            raise ValueError(f"{path} no es el manifest de un checkpoint del ETL")
+        return manifest
+
+    def _remove_files(self):
+        """
+        Borra el manifest y los archivos de salida que registra, nada más
+        """
+        manifest = self._read_manifest()
+        if manifest is None:
+            return
+        for outputs in manifest['outputs'].values():
+            for filename in outputs.values():
+                path = os.path.join(self.directory, os.path.basename(filename))
+                if os.path.exists(path):
+                    os.remove(path)
+        os.remove(os.path.join(self.directory, MANIFEST_FILE))
+
+    def _write(self, name, value):
+        if pa is not None and isinstance(value, pd.DataFrame):
+            filename = f"{name}.arrow"
+            try:
+                pa_feather.write_feather(
+                    pa.Table.from_pandas(value), os.path.join(self.directory, filename)
+                )
+                return filename
+            except (pa.ArrowException, TypeError):
+                # Columnas que Arrow no representa (objetos mixtos): se usa pickle
+                pass
+
+        filename = f"{name}.pkl"
+        with open(os.path.join(self.directory, filename), 'wb') as output:
+            pickle.dump(value, output, protocol=pickle.HIGHEST_PROTOCOL)
+        return filename
+
+    def _read(self, filename):
+        path = os.path.join(self.directory, filename)
+        if filename.endswith('.arrow'):
+            return pa_feather.read_table(path, memory_map=True).to_pandas()
+        with open(path, 'rb') as source:
+            return pickle.load(source)
+
+    def _write_manifest(self):
+        path = os.path.join(self.directory, MANIFEST_FILE)
+        pending = f"{path}.tmp"
+        with open(pending, 'w') as manifest_file:
+            json.dump(self.manifest, manifest_file, indent=2)
+        os.replace(pending, path)
@@ -0,0 +1,101 @@
+import numpy as np
+import pandas as pd
+
+# Una columna de texto pasa a categoría si sus valores distintos no superan esta
+# fracción de las filas (códigos e IDs que se repiten, no descripciones)
+CATEGORY_MAX_RATIO = 0.5
+
+# Columnas decimales que se guardan en punto fijo: columna -> (columna entera, escala)
+# unit_cost es DECIMAL(10,2) en source_inventory: se guarda en centavos
+FIXED_POINT_COLUMNS = {
+    'unit_cost': ('unit_cost_cents', 100),
+}
+
+
+def compact_frame(df):
+    """
+    Devuelve df con tipos compactos elegidos a partir de los datos: categorías
+    para el texto de baja cardinalidad, datetime64 para fechas, el entero más
+    pequeño que admite cada columna entera y punto fijo para FIXED_POINT_COLUMNS.
+    Los valores no cambian; las columnas con nulos conservan su tipo
+    """
+    converted = {}
+    for column in df.columns:
+        values = df[column]
+        if column in FIXED_POINT_COLUMNS:
+            fixed = _fixed_point(values, FIXED_POINT_COLUMNS[column][1])
+            if fixed is not None:
+                converted[column] = fixed
+        elif values.dtype == object:
+            kind = pd.api.types.infer_dtype(values, skipna=False)
+            if kind not in ('string', 'date'):
+                continue
+            # Una sola pasada de hash: los valores distintos se convierten una vez
+            codes, uniques = pd.factorize(values)
+            if kind == 'date':
+                converted[column] = pd.Series(pd.to_datetime(uniques).take(codes), index=values.index)
+            elif len(uniques) <= CATEGORY_MAX_RATIO * len(values):
+                converted[column] = pd.Series(
+                    pd.Categorical.from_codes(codes, pd.Index(uniques)), index=values.index
+                )
+        elif pd.api.types.is_integer_dtype(values.dtype):
+            converted[column] = _smallest_integer(values)
+
+    df = df.assign(**converted)
+    return df.rename(columns={
+        column: fixed_column for column, (fixed_column, _) in FIXED_POINT_COLUMNS.items()
+        if column in converted
+    })
+
+
+def _fixed_point(values, scale):
+    """
+    Valores decimales como enteros escalados, o None si alguno no es exacto con
+    esa escala o es nulo
+    """
+    if len(values) == 0 or values.isna().any():
+        return None
+    scaled = np.round(values.to_numpy(dtype=np.float64) * scale)
+    if not np.array_equal(scaled / scale, values.to_numpy(dtype=np.float64)):
+        return None
+    return _smallest_integer(pd.Series(scaled.astype(np.int64), index=values.index))
+
+
+def _smallest_integer(values):
+    """
+    Columna entera en el menor tipo con signo que contiene su mínimo y su máximo
+    """
+    if len(values) == 0:
+        return values
+    low, high = values.min(), values.max()
+    for dtype in (np.int8, np.int16, np.int32):
+        limits = np.iinfo(dtype)
+        if limits.min <= low and high <= limits.max:
+            return values.astype(dtype)
+    return values
+
+
+def decimal_values(df, column):
+    """
+    Valores float64 de una columna decimal, esté o no en punto fijo
+    """
+    if column in df.columns:
+        return df[column].to_numpy(dtype=np.float64)
+    fixed_column, scale = FIXED_POINT_COLUMNS[column]
+    return df[fixed_column].to_numpy(dtype=np.float64) / scale
+
+
+def source_column(df, column):
+    """
+    Nombre con el que está column en df (el de punto fijo si se compactó)
+    """
+    if column not in df.columns and column in FIXED_POINT_COLUMNS:
+        return FIXED_POINT_COLUMNS[column][0]
+    return column
+
+
+def memory_bytes(df):
+    """
+    Memoria de un DataFrame en bytes, incluido el contenido de los objetos
+    """
+    return int(df.memory_usage(index=True, deep=True).sum()) if df is not None else 0
@@ -0,0 +1,162 @@
+from datetime import date
+
+import numpy as np
+from sqlalchemy import text
+
+from partitions import month_bounds, month_keys
+from quarantine import QUARANTINE_COLUMNS, QUARANTINE_TABLE, QUARANTINE_TABLE_DDL
+from surrogate_keys import DIMENSION_KEYS
+from transforms import DUPLICATE_GRAIN, GRAIN_COLUMNS
+
+# Alias de cada dimensión unida a source_inventory (s) por su clave natural
+DIMENSION_ALIASES = {
+    'dim_product': 'p',
+    'dim_location': 'l',
+    'dim_supplier': 'su',
+}
+
+# Columnas de fact_inventory y su expresión SQL: el mismo mapeo que build_fact_frame,
+# con date_key calculado aritméticamente como en date_keys
+FACT_COLUMNS = {
+    'inventory_id': "s.inventory_id",
+    'product_key': "p.product_key",
+    'location_key': "l.location_key",
+    'date_key': (
+        "CAST(EXTRACT(YEAR FROM s.transaction_date) * 10000 + EXTRACT(MONTH FROM s.transaction_date) * 100 "
+        "+ EXTRACT(DAY FROM s.transaction_date) AS integer)"
+    ),
+    'supplier_key': "su.supplier_key",
+    'quantity_on_hand': "s.quantity_on_hand",
+    'unit_cost': "s.unit_cost",
+    'total_value': "s.quantity_on_hand * s.unit_cost",
+    'minimum_stock_level': "s.minimum_stock",
+    'maximum_stock_level': "s.maximum_stock",
+    'reorder_point': "s.reorder_point",
+    'units_sold': "s.units_sold",
+    'units_received': "s.units_received",
+}
+
+
+def _source_joins(tables, join):
+    """
+    Uniones de source_inventory con la versión vigente de cada dimensión; tables
+    da la tabla real de cada una (la copia de staging en modo swap)
+    """
+    return ' '.join(
+        f"{join} {tables[table]} {DIMENSION_ALIASES[table]} "
+        f"ON {DIMENSION_ALIASES[table]}.{id_column} = s.{id_column} AND {DIMENSION_ALIASES[table]}.is_current"
+        for table, id_column, _ in DIMENSION_KEYS
+    )
+
+
+def _source_filter(after, upto, date_range, alias='s'):
+    """
+    Registros con inventory_id en (after, upto] y, si se indica, con fecha en el
+    rango [desde, hasta) de date_key
+    """
+    where = f"{alias}.inventory_id > :after AND {alias}.inventory_id <= :upto"
+    params = {'after': after, 'upto': upto}
+    if date_range is not None:
+        where += f" AND {alias}.transaction_date >= :first_date AND {alias}.transaction_date < :next_date"
+        params.update(first_date=_key_date(date_range[0]), next_date=_key_date(date_range[1]))
+    return where, params
+
+
+def _key_date(date_key):
+    return date(date_key // 10000, date_key // 100 % 100, date_key % 100)
+
+
+def _superseded(after, upto, date_range):
+    """
+    Registros cuyo grano natural se repite más adelante en la misma carga: como en
+    build_fact_frame, solo se carga el de mayor inventory_id
+    """
+    where, _ = _source_filter(after, upto, date_range, alias='n')
+    return (
+        f"EXISTS (SELECT 1 FROM source_inventory n WHERE {where} "
+        f"AND n.product_id = s.product_id AND n.location_id = s.location_id "
+        f"AND n.supplier_id = s.supplier_id AND n.transaction_date = s.transaction_date "
+        f"AND n.inventory_id > s.inventory_id)"
+    )
+
+
+def month_ranges(date_keys, parts):
+    """
+    Divide los meses de date_keys en hasta parts rangos contiguos [desde, hasta)
+    de date_key, uno por sesión
+    """
+    months = month_keys(date_keys)
+    if not months:
+        return []
+    groups = np.array_split(np.asarray(months), min(parts, len(months)))
+    return [(month_bounds(int(group[0]))[0], month_bounds(int(group[-1]))[1]) for group in groups]
+
+
+def insert_facts(conn, tables, after, upto, run_id, date_range=None, replace=False, incremental=False):
+    """
+    Transforma y carga dentro de PostgreSQL los hechos de source_inventory con
+    inventory_id en (after, upto], con un INSERT ... SELECT unido a las
+    dimensiones, y envía a cuarentena los registros sin clave en alguna o con un
+    grano repetido más adelante: ninguna fila pasa por Python. Con date_range
+    solo se cargan esas fechas; replace borra antes los hechos del rango y lo ya
+    puesto en cuarentena en esta ejecución, de modo que repetir la sesión no
+    duplica nada. incremental reemplaza los hechos ya cargados con el grano de un
+    registro nuevo, que siempre tiene mayor inventory_id, y envía sus registros a
+    cuarentena. Devuelve las filas cargadas y el motivo de cada registro
+    rechazado (columnas de ID no resueltas o DUPLICATE_GRAIN)
+    """
+    where, params = _source_filter(after, upto, date_range)
+    superseded = _superseded(after, upto, date_range)
+    conn.execute(text(QUARANTINE_TABLE_DDL))
+    if replace:
+        conn.execute(
+            text(f"DELETE FROM {tables['fact_inventory']} WHERE date_key >= :first_key AND date_key < :next_key"),
+            {'first_key': date_range[0], 'next_key': date_range[1]}
+        )
+        conn.execute(text(
+            f"DELETE FROM {QUARANTINE_TABLE} q WHERE q.run_id = :run_id "
+            f"AND q.transaction_date >= :first_date AND q.transaction_date < :next_date"
+        ), {**params, 'run_id': run_id})
+
+    replaced = []
+    if incremental:
+        grain = ' AND '.join(f"f.{column} = {FACT_COLUMNS[column]}" for column in GRAIN_COLUMNS)
+        replaced = conn.execute(text(
+            f"DELETE FROM {tables['fact_inventory']} f USING source_inventory s {_source_joins(tables, 'JOIN')} "
+            f"WHERE {where} AND NOT {superseded} AND {grain} AND f.inventory_id < s.inventory_id "
+            f"RETURNING f.inventory_id"
+        ), params).scalars().all()
+
+    inserted = conn.execute(text(
+        f"INSERT INTO {tables['fact_inventory']} ({', '.join(FACT_COLUMNS)}) "
+        f"SELECT {', '.join(FACT_COLUMNS.values())} FROM source_inventory s "
+        f"{_source_joins(tables, 'JOIN')} WHERE {where} AND NOT {superseded}"
+    ), params).rowcount
+
+    # Columnas de ID no resueltas, en el orden de DIMENSION_KEYS como en resolve_keys
+    missing = ', '.join(
+        f"CASE WHEN {DIMENSION_ALIASES[table]}.{key_column} IS NULL THEN '{id_column}' END"
+        for table, id_column, key_column in DIMENSION_KEYS
+    )
+    unresolved = ' OR '.join(
+        f"{DIMENSION_ALIASES[table]}.{key_column} IS NULL" for table, _, key_column in DIMENSION_KEYS
+    )
+    missing_keys = conn.execute(text(
+        f"INSERT INTO {QUARANTINE_TABLE} ({', '.join(QUARANTINE_COLUMNS)}, missing_keys, run_id) "
+        f"SELECT {', '.join(f's.{column}' for column in QUARANTINE_COLUMNS)}, concat_ws(',', {missing}), :run_id "
+        f"FROM source_inventory s {_source_joins(tables, 'LEFT JOIN')} WHERE {where} AND ({unresolved}) "
+        f"RETURNING missing_keys"
+    ), {**params, 'run_id': run_id}).scalars().all()
+    missing_keys += conn.execute(text(
+        f"INSERT INTO {QUARANTINE_TABLE} ({', '.join(QUARANTINE_COLUMNS)}, missing_keys, run_id) "
+        f"SELECT {', '.join(f's.{column}' for column in QUARANTINE_COLUMNS)}, :reason, :run_id "
+        f"FROM source_inventory s {_source_joins(tables, 'JOIN')} WHERE {where} AND {superseded} "
+        f"RETURNING missing_keys"
+    ), {**params, 'run_id': run_id, 'reason': DUPLICATE_GRAIN}).scalars().all()
+    if replaced:
+        missing_keys += conn.execute(text(
+            f"INSERT INTO {QUARANTINE_TABLE} ({', '.join(QUARANTINE_COLUMNS)}, missing_keys, run_id) "
+            f"SELECT {', '.join(f's.{column}' for column in QUARANTINE_COLUMNS)}, :reason, :run_id "
+            f"FROM source_inventory s WHERE s.inventory_id = ANY(:ids) RETURNING missing_keys"
+        ), {'ids': replaced, 'run_id': run_id, 'reason': DUPLICATE_GRAIN}).scalars().all()
+    return inserted, missing_keys
@@ -0,0 +1,51 @@
+from sqlalchemy import text
+
+STATE_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS etl_state (
+        source_table VARCHAR(100) PRIMARY KEY,
+        watermark_column VARCHAR(100),
+        watermark_value BIGINT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+def get_watermark(conn, source_table):
+    """
+    Devuelve la marca de agua guardada para una tabla fuente, o 0 si no existe
+    """
+    conn.execute(text(STATE_TABLE_DDL))
+    value = conn.execute(
+        text("SELECT watermark_value FROM etl_state WHERE source_table = :source_table"),
+        {'source_table': source_table}
+    ).scalar()
+    return value or 0
+
+
+def set_watermark(conn, source_table, column, value):
+    """
+    Guarda la marca de agua de una tabla fuente dentro de la transacción de conn
+    """
+    conn.execute(text(STATE_TABLE_DDL))
+    conn.execute(
+        text("""
+            INSERT INTO etl_state (source_table, watermark_column, watermark_value)
+            VALUES (:source_table, :column, :value)
+            ON CONFLICT (source_table) DO UPDATE
+            SET watermark_column = EXCLUDED.watermark_column,
+                watermark_value = EXCLUDED.watermark_value,
+                updated_at = CURRENT_TIMESTAMP
+        """),
+        {'source_table': source_table, 'column': column, 'value': int(value)}
+    )
+
+
+def delete_watermark(conn, source_table):
+    """
+    Elimina la marca de agua de una tabla fuente dentro de la transacción de conn
+    """
+    conn.execute(text(STATE_TABLE_DDL))
+    conn.execute(
+        text("DELETE FROM etl_state WHERE source_table = :source_table"),
+        {'source_table': source_table}
+    )
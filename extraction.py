@@ -0,0 +1,131 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow es opcional: sin él solo está el backend 'sql'
+    pa = None
+
+# Tipo Arrow de cada columna del COPY según el OID de su tipo en PostgreSQL
+# (boolean, bigint, smallint, integer, real, double precision, numeric, date); el
+# resto se lee como texto. NUMERIC se lee como float64, igual que pd.read_sql_query
+ARROW_TYPES = {
+    16: 'bool', 20: 'int64', 21: 'int64', 23: 'int64',
+    700: 'float64', 701: 'float64', 1700: 'float64', 1082: 'date32',
+}
+
+
+def iter_query_chunks(engine, query, chunk_size):
+    """
+    Lee una consulta por bloques de chunk_size filas con un cursor con nombre en
+    el servidor, de modo que el resultado nunca se carga completo en memoria
+    """
+    with engine.connect() as conn:
+        conn = conn.execution_options(stream_results=True, max_row_buffer=chunk_size)
+        for chunk in pd.read_sql_query(query, conn, chunksize=chunk_size):
+            yield chunk
+
+
+def read_query(engine, query):
+    """
+    Lee una consulta con pd.read_sql_query
+    """
+    with engine.connect() as conn:
+        return pd.read_sql_query(query, conn)
+
+
+def read_query_copy(engine, query):
+    """
+    Lee una consulta con COPY (...) TO STDOUT en formato CSV y decodifica el flujo
+    con el lector CSV de pyarrow en columnas Arrow tipadas: el análisis del texto
+    se hace en C++ y las columnas numéricas pasan a pandas sin objetos Python.
+    Para devolver los mismos valores y dtypes que read_query, las columnas de
+    texto y las fechas (date_as_object) sí se convierten a un objeto str o date
+    por celda, y NUMERIC se lee como float64, perdiendo precisión igual que
+    pd.read_sql_query. El COPY escribe en un pipe desde otro hilo mientras pyarrow
+    lo lee por bloques: el texto CSV nunca se guarda completo y el pico de memoria
+    es la tabla Arrow más el DataFrame resultante
+    """
+    if pa is None:
+        raise RuntimeError("El backend de extracción 'copy' requiere pyarrow")
+
+    with engine.connect() as conn, conn.connection.cursor() as cursor:
+        # Nombres y tipos del resultado sin leer filas
+        cursor.execute(f"SELECT * FROM ({query}) AS t LIMIT 0")
+        columns = {column.name: column.type_code for column in cursor.description}
+
+        read_fd, write_fd = os.pipe()
+
+        def copy():
+            with open(write_fd, 'wb') as sink:
+                cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv)", sink)
+
+        with ThreadPoolExecutor(max_workers=1) as executor, open(read_fd, 'rb') as source:
+            copying = executor.submit(copy)
+            try:
+                table = _read_csv_stream(source, columns)
+            except BaseException:
+                # Cerrar el pipe corta el COPY en lugar de dejarlo bloqueado al escribir
+                source.close()
+                copying.exception()
+                raise
+            copying.result()
+
+    if table is None:
+        return pd.DataFrame(columns=list(columns))
+    return table.to_pandas(date_as_object=True)
+
+
+def _read_csv_stream(source, columns):
+    """
+    Decodifica por bloques el CSV de COPY con los tipos Arrow de cada columna;
+    devuelve None si el resultado no tiene filas
+    """
+    if not source.peek(1):
+        return None
+    reader = pa_csv.open_csv(
+        source,
+        read_options=pa_csv.ReadOptions(column_names=list(columns)),
+        convert_options=pa_csv.ConvertOptions(
+            column_types={name: pa.type_for_alias(ARROW_TYPES.get(oid, 'string'))
+                          for name, oid in columns.items()},
+            true_values=['t'], false_values=['f'],
+            # COPY escribe NULL como campo vacío sin comillas y la cadena vacía como "";
+            # textos como NA o NULL van sin comillas y no son nulos
+            null_values=[''], strings_can_be_null=True, quoted_strings_can_be_null=False,
+        ),
+    )
+    return reader.read_all()
+
+
+# Backends de extracción: pd.read_sql_query o COPY decodificado con pyarrow
+EXTRACT_BACKENDS = {
+    'sql': read_query,
+    'copy': read_query_copy,
+}
+
+
+def read_queries_parallel(engine, queries, max_workers, backend='sql'):
+    """
+    Ejecuta varias consultas a la vez en un pool de hilos con el backend de
+    extracción indicado; cada consulta usa su propia conexión del pool de
+    SQLAlchemy. Devuelve un DataFrame por nombre
+    """
+    if backend not in EXTRACT_BACKENDS:
+        raise ValueError(f"Backend de extracción desconocido: {backend}")
+    read = EXTRACT_BACKENDS[backend]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {name: executor.submit(read, engine, query) for name, query in queries.items()}
+        return {name: future.result() for name, future in futures.items()}
+
+
+def key_ranges(low, high, partitions):
+    """
+    Divide el rango de claves (low, high] en hasta partitions rangos contiguos
+    """
+    step = max(1, -(-(high - low) // partitions))
+    return [(start, min(start + step, high)) for start in range(low, high, step)]
@@ -0,0 +1,134 @@
+import json
+import logging
+import os
+import resource
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+# Métricas por etapa exportadas en formato OpenMetrics: (métrica, campo del evento,
+# cómo se combinan las ejecuciones repetidas de una etapa, ayuda)
+OPENMETRICS_GAUGES = [
+    ('etl_stage_runs', None, len, "Veces que se ejecutó la etapa"),
+    ('etl_stage_duration_seconds', 'seconds', sum, "Duración total de la etapa"),
+    ('etl_stage_rows', 'rows', sum, "Filas procesadas por la etapa"),
+    ('etl_stage_bytes', 'bytes', sum,
+     "Bytes leídos de la base de datos en la extracción o enviados en la carga"),
+    ('etl_stage_memory_delta_bytes', 'memory_delta_bytes', max,
+     "Mayor variación de memoria residente durante la etapa"),
+]
+
+
+def current_rss():
+    """
+    Memoria residente actual del proceso en bytes (Linux: /proc/self/statm)
+    """
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except OSError:
+        # Sin /proc solo se conoce el máximo histórico del proceso
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+@dataclass
+class StageEvent:
+    """
+    Evento estructurado de una etapa del ETL
+    """
+    run_id: str
+    variant: str
+    stage: str
+    started_at: str
+    seconds: float = 0.0
+    rows: int = 0
+    bytes: int = 0
+    memory_delta_bytes: int = 0
+    status: str = 'ok'
+
+
+class StageInstrumentation:
+    """
+    Mide cada etapa del ETL y emite un evento por etapa a un archivo JSON-lines
+    y, opcionalmente, las métricas de la última ejecución a un archivo OpenMetrics
+    """
+    def __init__(self, variant, events_path=None, metrics_path=None):
+        self.variant = variant
+        self.events_path = events_path
+        self.metrics_path = metrics_path
+        self.run_id = uuid.uuid4().hex
+        self.events = []
+        self._current = None
+
+    def record(self, rows=0, bytes=0):
+        """
+        Suma filas y bytes a la etapa en curso; fuera de una etapa no hace nada
+        """
+        if self._current is not None:
+            self._current.rows += int(rows)
+            self._current.bytes += int(bytes)
+
+    @contextmanager
+    def stage(self, name):
+        """
+        Mide la duración y la variación de memoria del bloque como la etapa name
+        """
+        event = StageEvent(self.run_id, self.variant, name, datetime.now(timezone.utc).isoformat())
+        self._current = event
+        rss_before = current_rss()
+        start = time.perf_counter()
+        try:
+            yield event
+        except BaseException:
+            event.status = 'error'
+            raise
+        finally:
+            event.seconds = time.perf_counter() - start
+            event.memory_delta_bytes = current_rss() - rss_before
+            self._current = None
+            self.events.append(event)
+            self._write_event(event)
+            logger.info(f"[{name}] {event.seconds:.2f}s, {event.rows} filas, "
+                        f"{event.bytes / 2**20:.1f} MB transferidos, "
+                        f"{event.memory_delta_bytes / 2**20:+.1f} MB de memoria")
+
+    def _write_event(self, event):
+        if self.events_path is None:
+            return
+        with open(self.events_path, 'a') as events_file:
+            events_file.write(json.dumps(asdict(event)) + '\n')
+
+    def write_metrics(self):
+        """
+        Escribe las métricas de las etapas de esta ejecución en formato OpenMetrics,
+        una muestra por etapa y estado: las etapas que se repiten (un lote CDC, una
+        corrección) se combinan en lugar de repetir la serie. El archivo se
+        reemplaza de forma atómica para que un recolector nunca lea uno a medias
+        """
+        if self.metrics_path is None:
+            return
+
+        stages = {}
+        for event in self.events:
+            stages.setdefault((event.stage, event.status), []).append(event)
+
+        lines = []
+        for metric, field, combine, help_text in OPENMETRICS_GAUGES:
+            lines.append(f"# TYPE {metric} gauge")
+            lines.append(f"# HELP {metric} {help_text}")
+            for (stage, status), events in stages.items():
+                labels = f'variant="{self.variant}",stage="{stage}",status="{status}"'
+                value = combine(events) if field is None else combine(getattr(event, field) for event in events)
+                lines.append(f"{metric}{{{labels}}} {value}")
+        lines.append("# EOF")
+
+        temporary_path = f"{self.metrics_path}.tmp"
+        with open(temporary_path, 'w') as metrics_file:
+            metrics_file.write('\n'.join(lines) + '\n')
+        os.replace(temporary_path, self.metrics_path)
@@ -0,0 +1,238 @@
+import io
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+
+from sqlalchemy import text
+
+from schema import estimated_rows, table_foreign_keys, table_indexes
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pyarrow es opcional: sin él se serializa con DataFrame.to_csv
+    pa = None
+
+# Método de carga por tabla: 'copy' (COPY ... FROM STDIN en formato CSV), 'to_sql'
+# o 'upsert' (COPY a una tabla temporal e INSERT ... ON CONFLICT según UPSERT_KEYS)
+DEFAULT_LOAD_METHODS = {
+    'dim_product': 'copy',
+    'dim_location': 'copy',
+    'dim_date': 'copy',
+    'dim_supplier': 'copy',
+    'fact_inventory': 'copy',
+}
+
+# Columnas que identifican una fila en las cargas 'upsert' (el grano de la tabla)
+UPSERT_KEYS = {
+    'fact_inventory': ['product_key', 'location_key', 'date_key', 'supplier_key'],
+}
+
+# Una carga es masiva, y conviene reconstruir índices y claves foráneas en lugar de
+# mantenerlos fila a fila, si agrega al menos esta fracción de las filas existentes
+BULK_LOAD_FRACTION = 0.2
+
+# Filas serializadas a CSV por bloque y bytes pedidos por lectura de COPY
+CSV_BATCH_ROWS = 100_000
+COPY_BUFFER_SIZE = 1 << 20
+
+
+def _to_csv(df):
+    """
+    Serializa un bloque a CSV; con pyarrow el formateo se hace en C++
+    """
+    if pa is None:
+        return df.to_csv(index=False, header=False).encode('utf-8')
+
+    sink = io.BytesIO()
+    pa_csv.write_csv(
+        pa.Table.from_pandas(df, preserve_index=False),
+        sink,
+        pa_csv.WriteOptions(include_header=False, quoting_style='needed')
+    )
+    return sink.getvalue()
+
+
+@dataclass
+class LoadStats:
+    """
+    Resultado de una carga: filas, bytes enviados y duración
+    """
+    table: str
+    rows: int
+    bytes: int
+    seconds: float
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds > 0 else float('inf')
+
+
+class _CSVStream:
+    """
+    Objeto tipo archivo que serializa un DataFrame a CSV por bloques, para que
+    COPY lo consuma sin materializar todo el texto en memoria
+    """
+    def __init__(self, df, batch_rows=CSV_BATCH_ROWS):
+        self._df = df
+        self._batch_rows = batch_rows
+        self._offset = 0
+        self._buffer = b''
+        self._position = 0
+        self.bytes_read = 0
+
+    def _next_batch(self):
+        batch = self._df.iloc[self._offset:self._offset + self._batch_rows]
+        self._offset += len(batch)
+        return _to_csv(batch)
+
+    def read(self, size=-1):
+        pending = len(self._buffer) - self._position
+        while (size < 0 or pending < size) and self._offset < len(self._df):
+            self._buffer = self._buffer[self._position:] + self._next_batch()
+            self._position = 0
+            pending = len(self._buffer)
+
+        end = len(self._buffer) if size < 0 else self._position + size
+        data = self._buffer[self._position:end]
+        self._position += len(data)
+        self.bytes_read += len(data)
+        return data
+
+
+def _csv_bytes(df):
+    """
+    Tamaño del DataFrame en el CSV que enviaría COPY, para medir con la misma
+    unidad las cargas que no pasan por COPY
+    """
+    stream = _CSVStream(df)
+    while stream.read(COPY_BUFFER_SIZE):
+        pass
+    return stream.bytes_read
+
+
+def copy_dataframe(conn, df, table):
+    """
+    Carga un DataFrame con COPY ... FROM STDIN (CSV) a través de la conexión
+    psycopg2 subyacente, dentro de la transacción de conn
+    """
+    columns = ', '.join(df.columns)
+    stream = _CSVStream(df)
+
+    if not conn.in_transaction():
+        conn.begin()
+
+    start = time.perf_counter()
+    with conn.connection.cursor() as cursor:
+        cursor.copy_expert(
+            f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)",
+            stream,
+            size=COPY_BUFFER_SIZE
+        )
+    return LoadStats(table, len(df), stream.bytes_read, time.perf_counter() - start)
+
+
+def upsert_dataframe(conn, df, table, key_columns):
+    """
+    Inserta o actualiza las filas de un DataFrame según key_columns: se copian con
+    COPY a una tabla temporal y se aplican con un único INSERT ... ON CONFLICT DO
+    UPDATE, dentro de la transacción de conn. Requiere un índice único sobre
+    key_columns; si una clave se repite en el lote, gana su última fila
+    """
+    start = time.perf_counter()
+    df = df.drop_duplicates(subset=key_columns, keep='last')
+    columns = ', '.join(df.columns)
+    updates = ', '.join(
+        f"{column} = EXCLUDED.{column}" for column in df.columns if column not in key_columns
+    )
+    temporary = f"tmp_upsert_{table}"
+
+    if not conn.in_transaction():
+        conn.begin()
+    conn.execute(text(
+        f"CREATE TEMPORARY TABLE {temporary} ON COMMIT DROP AS "
+        f"SELECT {columns} FROM {table} WITH NO DATA"
+    ))
+    stats = copy_dataframe(conn, df, temporary)
+    rows = conn.execute(text(f"""
+        INSERT INTO {table} ({columns})
+        SELECT {columns} FROM {temporary}
+        ON CONFLICT ({', '.join(key_columns)}) DO UPDATE SET {updates}
+    """)).rowcount
+    conn.execute(text(f"DROP TABLE {temporary}"))
+    return LoadStats(table, rows, stats.bytes, time.perf_counter() - start)
+
+
+def load_dataframe(conn, df, table, method='copy', chunksize=None):
+    """
+    Carga un DataFrame en la tabla indicada con el método elegido
+    """
+    if method == 'copy':
+        return copy_dataframe(conn, df, table)
+
+    if method == 'upsert':
+        if table not in UPSERT_KEYS:
+            raise ValueError(f"No hay claves de upsert definidas para {table}")
+        return upsert_dataframe(conn, df, table, UPSERT_KEYS[table])
+
+    if method == 'to_sql':
+        start = time.perf_counter()
+        df.to_sql(table, conn, if_exists='append', index=False, chunksize=chunksize)
+        return LoadStats(table, len(df), _csv_bytes(df), time.perf_counter() - start)
+
+    raise ValueError(f"Método de carga desconocido para {table}: {method}")
+
+
+@contextmanager
+def foreign_keys_dropped(conn, table):
+    """
+    Elimina las claves foráneas de table durante el bloque y las vuelve a crear al
+    final, de modo que cada una se valida con una sola consulta y no fila a fila.
+    Como el DDL es transaccional, si el bloque falla el rollback las restaura.
+    Quitar y crear una clave foránea toma ACCESS EXCLUSIVE sobre table y sobre la
+    tabla referenciada hasta el fin de la transacción: las dimensiones quedan
+    bloqueadas incluso para lectura mientras dura la carga
+    """
+    constraints = table_foreign_keys(conn, table)
+
+    for name, _ in constraints:
+        conn.execute(text(f'ALTER TABLE {table} DROP CONSTRAINT "{name}"'))
+
+    yield
+
+    for name, definition in constraints:
+        conn.execute(text(f'ALTER TABLE {table} ADD CONSTRAINT "{name}" {definition}'))
+
+
+def is_bulk_load(conn, table, rows):
+    """
+    Indica si cargar rows filas en table es una carga masiva (ver BULK_LOAD_FRACTION)
+    """
+    return rows >= BULK_LOAD_FRACTION * estimated_rows(conn, table)
+
+
+@contextmanager
+def secondary_indexes_dropped(conn, table, parallel_workers=None):
+    """
+    Elimina durante el bloque los índices no únicos de table que no respaldan
+    restricciones y los reconstruye al final, cada uno ordenando la tabla una vez
+    en lugar de insertar fila a fila. parallel_workers fija
+    max_parallel_maintenance_workers para la reconstrucción. Los índices únicos se
+    conservan porque garantizan el grano de la tabla
+    """
+    indexes = [
+        (name, definition)
+        for name, definition, constraint, _ in table_indexes(conn, table)
+        if constraint is None and not definition.startswith('CREATE UNIQUE')
+    ]
+
+    for name, _ in indexes:
+        conn.execute(text(f'DROP INDEX "{name}"'))
+
+    yield
+
+    if parallel_workers is not None:
+        conn.execute(text(f"SET LOCAL max_parallel_maintenance_workers = {int(parallel_workers)}"))
+    for _, definition in indexes:
+        # En una tabla particionada el índice se crea también en cada partición
+        conn.execute(text(definition.replace(' ON ONLY ', ' ON ', 1)))
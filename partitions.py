@@ -0,0 +1,84 @@
+import numpy as np
+from sqlalchemy import text
+
+from loading import copy_dataframe
+from schema import child_partitions, copy_foreign_keys, copy_indexes, rename_indexes
+
+# Columna de partición de la tabla de hechos (date_key YYYYMMDD, rangos mensuales)
+PARTITION_COLUMN = 'date_key'
+
+
+def month_keys(date_keys):
+    """
+    Meses (YYYYMM) distintos de una colección de date_key
+    """
+    return sorted(set((np.asarray(date_keys, dtype=np.int64) // 100).tolist()))
+
+
+def month_bounds(month):
+    """
+    Rango [desde, hasta) de date_key de un mes YYYYMM
+    """
+    year, month_number = divmod(month, 100)
+    following = (year + 1) * 100 + 1 if month_number == 12 else month + 1
+    return month * 100 + 1, following * 100 + 1
+
+
+def partition_name(table, month):
+    return f"{table}_{month}"
+
+
+def ensure_month_partitions(conn, table, date_keys, unlogged=False):
+    """
+    Crea las particiones mensuales de table que falten para los date_key dados y
+    devuelve sus nombres. PostgreSQL enruta luego cada fila a su partición
+    """
+    existing = set(child_partitions(conn, table))
+    created = []
+    for month in month_keys(date_keys):
+        name = partition_name(table, month)
+        if name in existing:
+            continue
+        start, end = month_bounds(month)
+        conn.execute(text(
+            f"CREATE {'UNLOGGED ' if unlogged else ''}TABLE {name} PARTITION OF {table} "
+            f"FOR VALUES FROM ({start}) TO ({end})"
+        ))
+        created.append(name)
+    return created
+
+
+def replace_month_partition(conn, table, month, df):
+    """
+    Reemplaza la partición de un mes por las filas de df sin tocar el resto de la
+    tabla. Las filas se copian a una tabla suelta con la restricción CHECK del rango,
+    los índices y las claves foráneas de table, de modo que ATTACH no vuelve a
+    validar ni a indexar nada; luego, en la transacción de conn, se separa y
+    elimina la partición anterior y se adjunta la nueva
+    """
+    name = partition_name(table, month)
+    replacement = f"{name}_new"
+    start, end = month_bounds(month)
+
+    conn.execute(text(f"DROP TABLE IF EXISTS {replacement}"))
+    conn.execute(text(f"CREATE TABLE {replacement} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    conn.execute(text(
+        f"ALTER TABLE {replacement} ADD CONSTRAINT {replacement}_range "
+        f"CHECK ({PARTITION_COLUMN} >= {start} AND {PARTITION_COLUMN} < {end})"
+    ))
+    stats = copy_dataframe(conn, df, replacement)
+
+    renames = copy_indexes(conn, table, replacement, lambda index: f"{name}_{index.removeprefix(table + '_')}")
+    copy_foreign_keys(conn, table, replacement)
+    conn.execute(text(f"ANALYZE {replacement}"))
+
+    if name in child_partitions(conn, table):
+        conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        conn.execute(text(f"DROP TABLE {name}"))
+    conn.execute(text(
+        f"ALTER TABLE {table} ATTACH PARTITION {replacement} FOR VALUES FROM ({start}) TO ({end})"
+    ))
+    conn.execute(text(f"ALTER TABLE {replacement} RENAME TO {name}"))
+    conn.execute(text(f"ALTER TABLE {name} DROP CONSTRAINT {replacement}_range"))
+    rename_indexes(conn, renames)
+    return stats
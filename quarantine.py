@@ -0,0 +1,33 @@
+from sqlalchemy import text
+
+from loading import copy_dataframe
+
+QUARANTINE_TABLE = 'fact_inventory_quarantine'
+
+# Registros de inventario que no se pudieron cargar como hechos, con las columnas
+# de ID natural que no se resolvieron o duplicate_grain si otro registro posterior
+# tiene el mismo grano
+QUARANTINE_TABLE_DDL = f"""
+    CREATE TABLE IF NOT EXISTS {QUARANTINE_TABLE} (
+        inventory_id INTEGER,
+        product_id VARCHAR(10),
+        location_id VARCHAR(10),
+        supplier_id VARCHAR(10),
+        transaction_date DATE,
+        missing_keys VARCHAR(100),
+        run_id VARCHAR(32),
+        quarantined_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Columnas de source_inventory que se guardan de cada registro rechazado
+QUARANTINE_COLUMNS = ['inventory_id', 'product_id', 'location_id', 'supplier_id', 'transaction_date']
+
+
+def quarantine_rows(conn, rejected, run_id):
+    """
+    Guarda los registros rechazados (QUARANTINE_COLUMNS y missing_keys) en la
+    tabla de cuarentena dentro de la transacción de conn
+    """
+    conn.execute(text(QUARANTINE_TABLE_DDL))
+    return copy_dataframe(conn, rejected.assign(run_id=run_id), QUARANTINE_TABLE)
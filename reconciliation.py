@@ -0,0 +1,149 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+import pandas as pd
+from sqlalchemy import text
+
+from partitions import month_bounds
+from surrogate_keys import DIMENSION_KEYS
+
+# Columnas de un registro de inventario que se comparan, en el orden del hash de
+# fila. Ambos lados producen los mismos tipos: en fact_inventory las claves se
+# vuelven a unir con sus dimensiones para recuperar los IDs naturales y la fecha
+SOURCE_ROW = (
+    "s.product_id, s.location_id, s.supplier_id, s.transaction_date, s.quantity_on_hand, "
+    "s.unit_cost, s.minimum_stock, s.maximum_stock, s.reorder_point, s.units_sold, s.units_received"
+)
+WAREHOUSE_ROW = (
+    "p.product_id, l.location_id, su.supplier_id, d.full_date, f.quantity_on_hand, "
+    "f.unit_cost, f.minimum_stock_level, f.maximum_stock_level, f.reorder_point, f.units_sold, f.units_received"
+)
+
+# Solo se esperan en fact_inventory los registros fuente cuyas claves naturales
+# resuelven a una versión vigente de cada dimensión y que no repiten el grano de un
+# registro posterior (el resto va a cuarentena)
+RESOLVABLE = " AND ".join(
+    f"EXISTS (SELECT 1 FROM {table} WHERE {table}.{id_column} = s.{id_column} AND {table}.is_current)"
+    for table, id_column, _ in DIMENSION_KEYS
+) + (
+    " AND NOT EXISTS (SELECT 1 FROM source_inventory n WHERE n.product_id = s.product_id "
+    "AND n.location_id = s.location_id AND n.supplier_id = s.supplier_id "
+    "AND n.transaction_date = s.transaction_date AND n.inventory_id > s.inventory_id)"
+)
+
+SOURCE_FROM = "FROM source_inventory s"
+SOURCE_MONTH = (
+    "CAST(EXTRACT(YEAR FROM s.transaction_date) * 100 + EXTRACT(MONTH FROM s.transaction_date) AS integer)"
+)
+WAREHOUSE_FROM = (
+    "FROM fact_inventory f "
+    "LEFT JOIN dim_product p ON p.product_key = f.product_key "
+    "LEFT JOIN dim_location l ON l.location_key = f.location_key "
+    "LEFT JOIN dim_supplier su ON su.supplier_key = f.supplier_key "
+    "LEFT JOIN dim_date d ON d.date_key = f.date_key"
+)
+WAREHOUSE_MONTH = "f.date_key / 100"
+
+# Medidas de cada mes: el checksum es la suma del hash de cada fila, que no
+# depende del orden, más las sumas de control de las medidas principales
+CHECKSUM_COLUMNS = ['rows', 'checksum', 'quantity_on_hand', 'total_value']
+
+
+def _checksum_query(row, from_clause, month, quantity, value, where=''):
+    return (
+        f"SELECT {month} AS month, COUNT(*) AS rows, "
+        f"SUM(hashtextextended(CAST(ROW({row}) AS text), 0)) AS checksum, "
+        f"SUM({quantity}) AS quantity_on_hand, SUM({value}) AS total_value "
+        f"{from_clause} {where} GROUP BY 1"
+    )
+
+
+SOURCE_CHECKSUM_QUERY = _checksum_query(
+    SOURCE_ROW, SOURCE_FROM, SOURCE_MONTH,
+    "s.quantity_on_hand", "s.quantity_on_hand * s.unit_cost", f"WHERE {RESOLVABLE}"
+)
+WAREHOUSE_CHECKSUM_QUERY = _checksum_query(
+    WAREHOUSE_ROW, WAREHOUSE_FROM, WAREHOUSE_MONTH, "f.quantity_on_hand", "f.total_value"
+)
+
+# Filas de un mes que no aparecen el mismo número de veces en ambos lados; el
+# rango por fecha limita la lectura de fact_inventory a la partición del mes
+DIFFERENCE_QUERY = f"""
+    SELECT row, COALESCE(source.n, 0) AS source_rows, COALESCE(warehouse.n, 0) AS warehouse_rows
+    FROM (
+        SELECT CAST(ROW({SOURCE_ROW}) AS text) AS row, COUNT(*) AS n {SOURCE_FROM}
+        WHERE s.transaction_date >= :first_date AND s.transaction_date < :next_date AND {RESOLVABLE}
+        GROUP BY 1
+    ) source
+    FULL JOIN (
+        SELECT CAST(ROW({WAREHOUSE_ROW}) AS text) AS row, COUNT(*) AS n {WAREHOUSE_FROM}
+        WHERE f.date_key >= :first_key AND f.date_key < :next_key
+        GROUP BY 1
+    ) warehouse USING (row)
+    WHERE source.n IS DISTINCT FROM warehouse.n
+    ORDER BY row
+    LIMIT :limit
+"""
+
+
+@dataclass
+class Reconciliation:
+    """
+    Resultado de conciliar source_inventory con fact_inventory: los checksums de
+    cada mes en ambos lados (months, columnas *_source y *_warehouse) y, para los
+    meses que no coinciden, las filas que difieren ({mes: DataFrame})
+    """
+    months: pd.DataFrame
+    differences: dict = field(default_factory=dict)
+    seconds: float = 0.0
+
+    @property
+    def mismatched_months(self):
+        return [int(month) for month in self.months.loc[~self.months['matches'], 'month']]
+
+    @property
+    def ok(self):
+        return bool(self.months['matches'].all())
+
+
+def _date_from_key(date_key):
+    return pd.Timestamp(str(date_key)).date()
+
+
+def reconcile(engine, drill_down_limit=20):
+    """
+    Compara source_inventory con fact_inventory por mes con checksums calculados
+    en el servidor, ambos lados a la vez en conexiones distintas. Solo en los
+    meses que no coinciden se buscan las filas que difieren (hasta
+    drill_down_limit por mes)
+    """
+    def run(query, params=None):
+        with engine.connect() as conn:
+            # Las sumas NUMERIC se conservan como Decimal para compararlas sin redondeo
+            return pd.read_sql(text(query), conn, params=params, coerce_float=False)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        source = executor.submit(run, SOURCE_CHECKSUM_QUERY)
+        warehouse = executor.submit(run, WAREHOUSE_CHECKSUM_QUERY)
+        months = source.result().merge(
+            warehouse.result(), on='month', how='outer', suffixes=('_source', '_warehouse')
+        )
+
+    months = months.sort_values('month', ignore_index=True)
+    matches = pd.Series(True, index=months.index)
+    for column in CHECKSUM_COLUMNS:
+        source_values, warehouse_values = months[f"{column}_source"], months[f"{column}_warehouse"]
+        matches &= (source_values == warehouse_values) & source_values.notna()
+    months['matches'] = matches
+
+    result = Reconciliation(months)
+    for month in result.mismatched_months:
+        first_key, next_key = month_bounds(month)
+        result.differences[month] = run(DIFFERENCE_QUERY, {
+            'first_date': _date_from_key(first_key), 'next_date': _date_from_key(next_key),
+            'first_key': first_key, 'next_key': next_key, 'limit': drill_down_limit,
+        })
+    result.seconds = time.perf_counter() - start
+    return result
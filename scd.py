@@ -0,0 +1,130 @@
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from loading import copy_dataframe
+
+# Atributos versionados de cada dimensión: un cambio en cualquiera crea una versión nueva
+TRACKED_ATTRIBUTES = {
+    'dim_product': [
+        'product_name', 'product_description', 'category', 'subcategory', 'brand',
+        'unit_measure', 'retail_price', 'perishable', 'shelf_life_days'
+    ],
+    'dim_location': [
+        'store_name', 'store_type', 'address', 'city', 'state', 'country', 'zone',
+        'storage_capacity'
+    ],
+    'dim_supplier': [
+        'supplier_name', 'contact_person', 'contact_email', 'phone', 'address', 'city',
+        'country', 'supply_category', 'lead_time_days'
+    ],
+}
+
+# Atributos INTEGER de las fuentes: con nulos pandas los lee como float64, cuyo hash
+# difiere del de los enteros, y se hashean como enteros anulables
+INTEGER_ATTRIBUTES = {'shelf_life_days', 'storage_capacity', 'lead_time_days'}
+
+# Columnas de historia de las dimensiones con SCD tipo 2
+SCD_COLUMNS = [
+    ('row_hash', 'BIGINT'),
+    ('valid_from', 'TIMESTAMP DEFAULT CURRENT_TIMESTAMP'),
+    ('valid_to', 'TIMESTAMP'),
+    ('is_current', 'BOOLEAN DEFAULT TRUE'),
+]
+
+
+def row_hashes(df, columns):
+    """
+    Hash de 64 bits de los atributos versionados de cada fila, calculado en bloque
+    con pandas y expresado como entero con signo para guardarlo en un BIGINT. El
+    hash de una fila no depende de las demás: un nulo en otra fila no cambia el
+    tipo con que se hashean sus atributos enteros
+    """
+    values = df[columns].astype({column: 'Int64' for column in columns if column in INTEGER_ATTRIBUTES})
+    return pd.util.hash_pandas_object(values, index=False).to_numpy().view(np.int64)
+
+
+@dataclass
+class SCDMergeResult:
+    """
+    Resultado de aplicar SCD tipo 2 a una dimensión: versiones expiradas y las
+    claves de las versiones nuevas por ID natural
+    """
+    table: str
+    expired: int
+    ids: list
+    keys: list
+    bytes: int
+    seconds: float
+
+    @property
+    def inserted(self):
+        return len(self.keys)
+
+
+def merge_scd2(conn, df, table, id_column, key_column):
+    """
+    Compara las filas transformadas con la versión vigente de la dimensión por
+    row_hash, con SQL sobre una tabla de staging temporal: expira las versiones
+    que cambiaron e inserta una versión nueva para ellas y para los IDs nuevos.
+    Las claves de las versiones nuevas se asignan a partir de la mayor existente.
+    Todo ocurre dentro de la transacción de conn
+    """
+    start = time.perf_counter()
+    staging = f"stg_{table}"
+    columns = [column for column in df.columns if column != key_column]
+    column_list = ', '.join(columns)
+
+    conn.execute(text(
+        f"CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS "
+        f"SELECT {column_list} FROM {table} WITH NO DATA"
+    ))
+    stats = copy_dataframe(conn, df[columns], staging)
+    conn.execute(text(f"ANALYZE {staging}"))
+
+    # Expirar las versiones vigentes cuyos atributos cambiaron
+    expired = conn.execute(text(f"""
+        UPDATE {table} AS d
+        SET valid_to = CURRENT_TIMESTAMP, is_current = FALSE
+        FROM {staging} AS s
+        WHERE d.{id_column} = s.{id_column}
+          AND d.is_current
+          AND d.row_hash IS DISTINCT FROM s.row_hash
+    """)).rowcount
+
+    # Insertar una versión vigente para los IDs que ya no tienen ninguna
+    inserted = conn.execute(text(f"""
+        INSERT INTO {table} ({key_column}, {column_list}, valid_from, valid_to, is_current)
+        SELECT m.max_key + ROW_NUMBER() OVER (ORDER BY s.{id_column}),
+               {', '.join(f's.{column}' for column in columns)},
+               CURRENT_TIMESTAMP, NULL, TRUE
+        FROM {staging} AS s
+        CROSS JOIN (SELECT COALESCE(MAX({key_column}), 0) AS max_key FROM {table}) AS m
+        WHERE NOT EXISTS (
+            SELECT 1 FROM {table} AS d
+            WHERE d.{id_column} = s.{id_column} AND d.is_current
+        )
+        RETURNING {id_column}, {key_column}
+    """)).all()
+
+    return SCDMergeResult(
+        table, expired,
+        [row[0] for row in inserted], [row[1] for row in inserted],
+        stats.bytes, time.perf_counter() - start
+    )
+
+
+def expire_versions(conn, table, id_column, ids):
+    """
+    Expira, dentro de la transacción de conn, la versión vigente de los IDs
+    borrados en la fuente sin crear una nueva; la historia y los hechos que la
+    referencian se conservan. Devuelve las versiones expiradas
+    """
+    return conn.execute(text(f"""
+        UPDATE {table}
+        SET valid_to = CURRENT_TIMESTAMP, is_current = FALSE
+        WHERE {id_column} = ANY(:ids) AND is_current
+    """), {'ids': list(ids)}).rowcount
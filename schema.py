@@ -0,0 +1,113 @@
+from sqlalchemy import text
+
+
+def table_indexes(conn, table):
+    """
+    Índices de una tabla: (nombre, definición, restricción que lo respalda o None,
+    definición de la restricción)
+    """
+    return conn.execute(text("""
+        SELECT i.relname, pg_get_indexdef(x.indexrelid), c.conname, pg_get_constraintdef(c.oid)
+        FROM pg_index x
+        JOIN pg_class i ON i.oid = x.indexrelid
+        LEFT JOIN pg_constraint c ON c.conindid = x.indexrelid AND c.conrelid = x.indrelid
+        WHERE x.indrelid = CAST(:table AS regclass)
+    """), {'table': table}).all()
+
+
+def table_foreign_keys(conn, table):
+    """
+    Claves foráneas de una tabla: (nombre, definición)
+    """
+    return conn.execute(text("""
+        SELECT conname, pg_get_constraintdef(oid)
+        FROM pg_constraint
+        WHERE conrelid = CAST(:table AS regclass) AND contype = 'f' AND conparentid = 0
+    """), {'table': table}).all()
+
+
+def estimated_rows(conn, table):
+    """
+    Filas estimadas de una tabla según las estadísticas del catálogo (sin recorrerla);
+    en una tabla particionada, la suma de sus particiones si es mayor
+    """
+    return conn.execute(text("""
+        SELECT GREATEST(
+            (SELECT reltuples FROM pg_class WHERE oid = CAST(:table AS regclass)),
+            (SELECT COALESCE(SUM(GREATEST(c.reltuples, 0)), 0)
+             FROM pg_inherits i
+             JOIN pg_class c ON c.oid = i.inhrelid
+             WHERE i.inhparent = CAST(:table AS regclass)),
+            0
+        )
+    """), {'table': table}).scalar()
+
+
+def is_partitioned(conn, table):
+    return conn.execute(
+        text("SELECT relkind = 'p' FROM pg_class WHERE oid = CAST(:table AS regclass)"),
+        {'table': table}
+    ).scalar()
+
+
+def has_column(conn, table, column):
+    return conn.execute(
+        text("SELECT 1 FROM pg_attribute WHERE attrelid = CAST(:table AS regclass) "
+             "AND attname = :column AND NOT attisdropped"),
+        {'table': table, 'column': column}
+    ).first() is not None
+
+
+def child_partitions(conn, table):
+    """
+    Nombres de las particiones de una tabla particionada
+    """
+    return conn.execute(text("""
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = CAST(:table AS regclass)
+        ORDER BY c.relname
+    """), {'table': table}).scalars().all()
+
+
+def copy_indexes(conn, source, target, final_name=None):
+    """
+    Construye en target los índices de source (PRIMARY KEY y UNIQUE como
+    restricciones) con nombres provisionales, y devuelve los pares (provisional,
+    definitivo) para renombrarlos cuando la tabla anterior ya no exista.
+    final_name(nombre) da el nombre definitivo; por defecto, el mismo de source
+    """
+    renames = []
+    for name, definition, constraint, constraint_definition in table_indexes(conn, source):
+        final = final_name(name) if final_name else name
+        provisional = f"{final}_new"
+        if constraint:
+            conn.execute(text(f'ALTER TABLE {target} ADD CONSTRAINT "{provisional}" {constraint_definition}'))
+        else:
+            head, tail = definition.split(' USING ', 1)
+            unique = 'UNIQUE ' if head.startswith('CREATE UNIQUE') else ''
+            conn.execute(text(f'CREATE {unique}INDEX "{provisional}" ON {target} USING {tail}'))
+        renames.append((provisional, final))
+    return renames
+
+
+def rename_indexes(conn, renames):
+    """
+    Da a los índices su nombre definitivo; renombrar el índice de una restricción
+    renombra también la restricción
+    """
+    for provisional, final in renames:
+        conn.execute(text(f'ALTER INDEX "{provisional}" RENAME TO "{final}"'))
+
+
+def copy_foreign_keys(conn, source, target, referenced=None):
+    """
+    Crea en target las claves foráneas de source; referenced permite redirigir
+    las tablas referenciadas ({tabla: tabla nueva}). Cada una se valida con una
+    sola consulta sobre target
+    """
+    for name, definition in table_foreign_keys(conn, source):
+        for table, replacement in (referenced or {}).items():
+            definition = definition.replace(f"REFERENCES {table}(", f"REFERENCES {replacement}(")
+        conn.execute(text(f'ALTER TABLE {target} ADD CONSTRAINT "{name}" {definition}'))
@@ -0,0 +1,116 @@
+import hashlib
+import logging
+import os
+import shutil
+
+from sqlalchemy import text
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as pa_dataset
+    import pyarrow.fs as pa_fs
+except ImportError:  # pyarrow es opcional: sin él no hay caché de snapshots
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# Snapshots particionados: tabla -> (columna de fecha cuyo mes define la partición,
+# columna que restablece el orden de las filas al leerlos)
+PARTITIONED_SNAPSHOTS = {
+    'source_inventory': ('transaction_date', 'inventory_id'),
+}
+PARTITION_FIELD = 'transaction_month'
+
+
+def source_fingerprint(conn, query):
+    """
+    Huella del resultado de una consulta calculada en el servidor, sin transferir
+    filas: su número y la suma del hash de cada una (independiente del orden)
+    """
+    count, checksum = conn.execute(text(
+        f"SELECT COUNT(*), COALESCE(SUM(hashtextextended(CAST(t AS text), 0)), 0) "
+        f"FROM ({query}) AS t"
+    )).one()
+    return f"{count}:{checksum}"
+
+
+class SnapshotCache:
+    """
+    Snapshots Parquet de las tablas fuente extraídas, en directory/<tabla>/<clave>.
+    La clave resume la consulta y la huella de su resultado, de modo que una
+    fuente sin cambios se lee de disco con memory-map en lugar de consultarse
+    otra vez. Se conserva solo el último snapshot de cada tabla
+    """
+
+    def __init__(self, directory):
+        if pa is None:
+            raise RuntimeError("La caché de snapshots Parquet requiere pyarrow")
+        self.directory = directory
+        self.filesystem = pa_fs.LocalFileSystem(use_mmap=True)
+
+    def path(self, table, key):
+        return os.path.join(self.directory, table, key)
+
+    def lookup(self, engine, queries):
+        """
+        Calcula la clave de cada consulta ({tabla: consulta}) y lee los snapshots
+        vigentes. Devuelve ({tabla: DataFrame} de los encontrados, {tabla: clave})
+        """
+        with engine.connect() as conn:
+            keys = {
+                table: hashlib.sha1(f"{query}\n{source_fingerprint(conn, query)}".encode()).hexdigest()[:16]
+                for table, query in queries.items()
+            }
+
+        frames = {}
+        for table, key in keys.items():
+            path = self.path(table, key)
+            if os.path.isdir(path):
+                frames[table] = self.read(table, path)
+                logger.info(f"  {table}: snapshot vigente en {path} ({len(frames[table])} filas)")
+        return frames, keys
+
+    def read(self, table, path):
+        dataset = pa_dataset.dataset(path, format='parquet', filesystem=self.filesystem)
+        df = dataset.to_table().to_pandas()
+        if table in PARTITIONED_SNAPSHOTS:
+            _, order_column = PARTITIONED_SNAPSHOTS[table]
+            df = df.sort_values(order_column, kind='stable', ignore_index=True)
+        return df
+
+    def save(self, table, key, df):
+        """
+        Escribe el snapshot de una tabla, particionado por mes si corresponde, en un
+        directorio temporal que luego reemplaza a los snapshots anteriores
+        """
+        if df.empty:
+            return
+        table_directory = os.path.join(self.directory, table)
+        os.makedirs(table_directory, exist_ok=True)
+        path = self.path(table, key)
+        pending = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(pending, ignore_errors=True)
+
+        data = pa.Table.from_pandas(df, preserve_index=False)
+        if table in PARTITIONED_SNAPSHOTS:
+            date_column, _ = PARTITIONED_SNAPSHOTS[table]
+            # Mes YYYYMM calculado con pyarrow sobre la columna ya convertida
+            dates = data[date_column].cast(pa.date32())
+            months = pc.add(pc.multiply(pc.year(dates), 100), pc.month(dates))
+            data = data.append_column(PARTITION_FIELD, months)
+            partitioning = pa_dataset.partitioning(
+                pa.schema([(PARTITION_FIELD, months.type)]), flavor='hive'
+            )
+        else:
+            partitioning = None
+
+        pa_dataset.write_dataset(
+            data, pending, format='parquet', partitioning=partitioning,
+            existing_data_behavior='overwrite_or_ignore'
+        )
+        for previous in os.listdir(table_directory):
+            previous = os.path.join(table_directory, previous)
+            if previous != pending:
+                shutil.rmtree(previous, ignore_errors=True)
+        os.replace(pending, path)
@@ -0,0 +1,97 @@
+from sqlalchemy import text
+
+from schema import (
+    child_partitions, copy_foreign_keys, copy_indexes, is_partitioned, rename_indexes, table_indexes
+)
+
+STAGING_SUFFIX = '_staging'
+
+
+def staging_table(table):
+    return f"{table}{STAGING_SUFFIX}"
+
+
+def create_staging_tables(conn, tables):
+    """
+    Crea una copia UNLOGGED y vacía de cada tabla, con sus columnas, valores por
+    defecto y restricciones CHECK pero sin índices ni claves foráneas, para cargarla
+    sin escribir WAL ni mantener índices fila a fila. Reemplaza staging anteriores.
+    La copia de una tabla particionada también es particionada (PostgreSQL no admite
+    que sea UNLOGGED); sus particiones se crean UNLOGGED al cargarla
+    """
+    for table in tables:
+        staging = staging_table(table)
+        conn.execute(text(f"DROP TABLE IF EXISTS {staging} CASCADE"))
+        if is_partitioned(conn, table):
+            partition_key = conn.execute(
+                text("SELECT pg_get_partkeydef(CAST(:table AS regclass))"), {'table': table}
+            ).scalar()
+            conn.execute(text(
+                f"CREATE TABLE {staging} (LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS "
+                f"INCLUDING STORAGE) PARTITION BY {partition_key}"
+            ))
+        else:
+            conn.execute(text(
+                f"CREATE UNLOGGED TABLE {staging} "
+                f"(LIKE {table} INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE)"
+            ))
+
+
+def _owned_sequences(conn, table):
+    """
+    Secuencias de columnas SERIAL de la tabla: (columna, secuencia)
+    """
+    return conn.execute(text("""
+        SELECT a.attname, pg_get_serial_sequence(:table, a.attname)
+        FROM pg_attribute a
+        WHERE a.attrelid = CAST(:table AS regclass) AND a.attnum > 0 AND NOT a.attisdropped
+          AND pg_get_serial_sequence(:table, a.attname) IS NOT NULL
+    """), {'table': table}).all()
+
+
+def swap_staging_tables(conn, tables):
+    """
+    Reemplaza cada tabla por su copia de staging dentro de la transacción de conn.
+
+    Primero, sin bloquear las tablas vivas, pasa cada copia a LOGGED, construye en
+    ella los índices de la tabla viva, la analiza y crea sus claves foráneas
+    apuntando a las copias. Al final renombra las tablas, traspasa las secuencias SERIAL,
+    elimina las versiones anteriores y devuelve a índices, restricciones y
+    particiones sus nombres originales. Los lectores solo esperan el breve bloqueo
+    de los RENAME hasta el commit y nunca ven tablas vacías o a medio cargar
+    """
+    renames = []
+    partitions = {}
+    for table in tables:
+        staging = staging_table(table)
+        partitions[table] = child_partitions(conn, staging) if is_partitioned(conn, staging) else []
+        for relation in partitions[table] or [staging]:
+            conn.execute(text(f"ALTER TABLE {relation} SET LOGGED"))
+        renames += copy_indexes(conn, table, staging)
+        conn.execute(text(f"ANALYZE {staging}"))
+
+    # Las claves foráneas entre tablas intercambiadas apuntan a las copias, que
+    # conservan la referencia al renombrarse
+    referenced = {table: staging_table(table) for table in tables}
+    for table in tables:
+        copy_foreign_keys(conn, table, staging_table(table), referenced)
+
+    sequences = {table: _owned_sequences(conn, table) for table in tables}
+
+    for table in tables:
+        conn.execute(text(f"ALTER TABLE {table} RENAME TO {table}_old"))
+        conn.execute(text(f"ALTER TABLE {staging_table(table)} RENAME TO {table}"))
+        # La secuencia pasa a la tabla nueva para que no se elimine con la anterior
+        for column, sequence in sequences[table]:
+            conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.{column}"))
+
+    conn.execute(text(f"DROP TABLE {', '.join(f'{table}_old' for table in tables)}"))
+    rename_indexes(conn, renames)
+    for table in tables:
+        staging = staging_table(table)
+        for partition in partitions[table]:
+            renamed = f"{table}{partition.removeprefix(staging)}"
+            conn.execute(text(f"ALTER TABLE {partition} RENAME TO {renamed}"))
+            for index, *_ in table_indexes(conn, renamed):
+                if index.startswith(staging):
+                    conn.execute(text(f'ALTER INDEX "{index}" RENAME TO "{table}{index.removeprefix(staging)}"'))
@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+# Dimensiones con clave subrogada: (tabla, clave natural, clave subrogada)
+DIMENSION_KEYS = [
+    ('dim_product', 'product_id', 'product_key'),
+    ('dim_location', 'location_id', 'location_key'),
+    ('dim_supplier', 'supplier_id', 'supplier_key'),
+]
+
+
+class SurrogateKeyMap:
+    """
+    Mapeo persistente clave natural -> clave subrogada de una dimensión.
+
+    Los IDs naturales se guardan en un índice hash de pandas y las claves en un
+    arreglo NumPy, de modo que resolver una columna completa es un get_indexer
+    seguido de un take. Con historia SCD tipo 2 solo se mapea la versión vigente;
+    max_key es la mayor clave de la tabla, incluidas las versiones expiradas
+    """
+    def __init__(self, table, id_column, key_column, ids=(), keys=(), max_key=0):
+        self.table = table
+        self.id_column = id_column
+        self.key_column = key_column
+        self.max_key = max_key
+        self._set(pd.Index(ids, dtype=object), np.asarray(keys, dtype=np.int64))
+
+    @classmethod
+    def load(cls, conn, table, id_column, key_column):
+        """
+        Lee una sola vez las claves vigentes ya asignadas en la tabla de dimensión
+        """
+        existing = pd.read_sql(f"SELECT {id_column}, {key_column} FROM {table} WHERE is_current", conn)
+        max_key = conn.execute(text(f"SELECT COALESCE(MAX({key_column}), 0) FROM {table}")).scalar()
+        return cls(table, id_column, key_column, existing[id_column], existing[key_column], max_key)
+
+    def _set(self, ids, keys):
+        self.ids = ids
+        self.keys = keys
+        # Centinela al final: la posición -1 de get_indexer resuelve a la clave -1
+        self._lookup_keys = np.append(keys, -1)
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def next_key(self):
+        return max(int(self.keys.max()) if len(self.keys) else 0, self.max_key) + 1
+
+    def assign(self, ids):
+        """
+        Devuelve las claves de los IDs dados, asignando claves nuevas solo a los no vistos
+        """
+        ids = pd.Index(ids, dtype=object)
+        unseen = ids[self.ids.get_indexer(ids) == -1].unique()
+        if len(unseen):
+            new_keys = np.arange(self.next_key, self.next_key + len(unseen), dtype=np.int64)
+            self._set(self.ids.append(unseen), np.concatenate([self.keys, new_keys]))
+        return self.lookup(ids)
+
+    def update(self, ids, keys):
+        """
+        Reemplaza la clave vigente de los IDs dados (versiones nuevas de SCD tipo 2)
+        """
+        ids = pd.Index(ids, dtype=object)
+        keys = np.asarray(keys, dtype=np.int64)
+        positions = self.ids.get_indexer(ids)
+        known = positions >= 0
+
+        current_keys = self.keys.copy()
+        current_keys[positions[known]] = keys[known]
+        self._set(self.ids.append(ids[~known]), np.concatenate([current_keys, keys[~known]]))
+        if len(keys):
+            self.max_key = max(self.max_key, int(keys.max()))
+
+    def lookup(self, ids):
+        """
+        Resuelve IDs naturales a claves subrogadas; los IDs desconocidos dan -1
+        """
+        if isinstance(getattr(ids, 'dtype', None), pd.CategoricalDtype):
+            # Se resuelven solo las categorías y se expanden con los códigos
+            category_keys = np.append(self.lookup(ids.cat.categories), -1)
+            return category_keys.take(ids.cat.codes.to_numpy())
+        return self._lookup_keys.take(self.ids.get_indexer(ids))
+
+
+def load_key_maps(conn):
+    """
+    Carga los mapas de claves de todas las dimensiones, indexados por clave natural
+    """
+    return {
+        id_column: SurrogateKeyMap.load(conn, table, id_column, key_column)
+        for table, id_column, key_column in DIMENSION_KEYS
+    }
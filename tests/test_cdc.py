@@ -0,0 +1,126 @@
+import struct
+from datetime import date
+
+from cdc import UNCHANGED, _decode, _tuple
+
+# Mensajes de pgoutput (proto_version 1) leídos de un slot con
+# pg_logical_slot_peek_binary_changes para esta transacción, con la identidad de
+# réplica por defecto:
+#   INSERT INTO source_suppliers (supplier_id, supplier_name, city, lead_time_days)
+#       VALUES ('S9999', 'Proveedor Ñandú', NULL, 7);
+#   INSERT INTO source_inventory VALUES (40000001, 'P409', 'L197', 'S9999', '2024-02-29',
+#       10, 12.50, 1, 20, 5, 3, 0);
+#   UPDATE source_inventory SET quantity_on_hand = 11 WHERE inventory_id = 40000001;
+#   DELETE FROM source_inventory WHERE inventory_id = 40000001;
+#   DELETE FROM source_suppliers WHERE supplier_id = 'S9999';
+RECORDED_MESSAGES = [
+    ('5/FCFA6150', bytes.fromhex(
+        '4200000005fcfab1a000030101856a937500000ed2'
+    )),
+    ('5/FCFA6150', bytes.fromhex(
+        '520000400f7075626c696300736f757263655f737570706c696572730064000a01737570706c6965'
+        '725f696400000004130000000e00737570706c6965725f6e616d6500000004130000006800636f6e'
+        '746163745f706572736f6e00000004130000006800636f6e746163745f656d61696c000000041300'
+        '0000680070686f6e6500000004130000001800616464726573730000000413000000cc0063697479'
+        '00000004130000006800636f756e74727900000004130000003600737570706c795f63617465676f'
+        '7279000000041300000036006c6561645f74696d655f646179730000000017ffffffff'
+    )),
+    ('5/FCFA6150', bytes.fromhex(
+        '490000400f4e000a74000000055339393939740000001150726f766565646f7220c391616e64c3ba'
+        '6e6e6e6e6e6e6e740000000137'
+    )),
+    ('5/FCFA78F0', bytes.fromhex(
+        '52000040177075626c696300736f757263655f696e76656e746f72790064000c01696e76656e746f'
+        '72795f69640000000017ffffffff0070726f647563745f696400000004130000000e006c6f636174'
+        '696f6e5f696400000004130000000e00737570706c6965725f696400000004130000000e00747261'
+        '6e73616374696f6e5f64617465000000043affffffff007175616e746974795f6f6e5f68616e6400'
+        '00000017ffffffff00756e69745f636f737400000006a4000a0006006d696e696d756d5f73746f63'
+        '6b0000000017ffffffff006d6178696d756d5f73746f636b0000000017ffffffff0072656f726465'
+        '725f706f696e740000000017ffffffff00756e6974735f736f6c640000000017ffffffff00756e69'
+        '74735f72656365697665640000000017ffffffff'
+    )),
+    ('5/FCFA78F0', bytes.fromhex(
+        '49000040174e000c7400000008343030303030303174000000045034303974000000044c31393774'
+        '000000055339393939740000000a323032342d30322d323974000000023130740000000531322e35'
+        '3074000000013174000000023230740000000135740000000133740000000130'
+    )),
+    ('5/FCFAB088', bytes.fromhex(
+        '55000040174e000c7400000008343030303030303174000000045034303974000000044c31393774'
+        '000000055339393939740000000a323032342d30322d323974000000023131740000000531322e35'
+        '3074000000013174000000023230740000000135740000000133740000000130'
+    )),
+    ('5/FCFAB108', bytes.fromhex(
+        '44000040174b000c740000000834303030303030316e6e6e6e6e6e6e6e6e6e6e'
+    )),
+    ('5/FCFAB150', bytes.fromhex(
+        '440000400f4b000a740000000553393939396e6e6e6e6e6e6e6e6e'
+    )),
+    ('5/FCFAB1D0', bytes.fromhex(
+        '430000000005fcfab1a000000005fcfab1d000030101856a9375'
+    )),
+]
+
+
+def test_decode_recorded_transaction():
+    batch = _decode(RECORDED_MESSAGES)
+
+    assert batch.lsn == '5/FCFAB1D0'
+    assert [(change.table, change.operation) for change in batch.changes] == [
+        ('source_suppliers', 'I'),
+        ('source_inventory', 'I'),
+        ('source_inventory', 'U'),
+        ('source_inventory', 'D'),
+        ('source_suppliers', 'D'),
+    ]
+
+
+def test_decode_parses_values_by_type():
+    supplier, inventory = _decode(RECORDED_MESSAGES).changes[:2]
+
+    assert supplier.new['supplier_name'] == 'Proveedor Ñandú'
+    assert supplier.new['city'] is None
+    assert supplier.new['lead_time_days'] == 7
+    assert inventory.new['inventory_id'] == 40000001
+    assert inventory.new['transaction_date'] == date(2024, 2, 29)
+    assert inventory.new['unit_cost'] == 12.5
+
+
+def test_decode_old_tuples_follow_replica_identity():
+    update, delete = _decode(RECORDED_MESSAGES).changes[2:4]
+
+    # Con la identidad por defecto UPDATE no envía el registro anterior y DELETE solo la clave
+    assert update.old is None
+    assert update.new['quantity_on_hand'] == 11
+    assert delete.new is None
+    assert delete.old['inventory_id'] == 40000001
+    assert delete.old['product_id'] is None
+
+
+def test_table_changes_keep_final_state_by_key():
+    # Sin los borrados ni el COMMIT: el lote no avanza el slot pero se condensa igual
+    batch = _decode(RECORDED_MESSAGES[:6])
+    inventory = batch.table_changes('source_inventory')
+
+    assert batch.lsn is None
+    assert inventory.deleted == []
+    assert inventory.upserts['inventory_id'].tolist() == [40000001]
+    assert inventory.upserts['quantity_on_hand'].tolist() == [11]
+
+
+def test_table_changes_drop_rows_deleted_in_the_batch():
+    batch = _decode(RECORDED_MESSAGES)
+
+    assert batch.table_changes('source_inventory').upserts.empty
+    assert batch.table_changes('source_inventory').deleted == [40000001]
+    assert batch.table_changes('source_suppliers').deleted == ['S9999']
+    assert len(batch.table_changes('source_products')) == 0
+
+
+def test_tuple_marks_unchanged_toast_values():
+    data = struct.pack('!h', 3) + b't' + struct.pack('!i', 2) + b'42' + b'u' + b'n'
+    columns = [('id', int), ('description', str), ('brand', str)]
+
+    values, offset = _tuple(data, 0, columns)
+
+    assert values == {'id': 42, 'description': UNCHANGED, 'brand': None}
+    assert offset == len(data)
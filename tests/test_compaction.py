@@ -0,0 +1,36 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from compaction import compact_frame, decimal_values
+
+
+def test_compact_frame_chooses_compact_types():
+    df = pd.DataFrame({
+        'inventory_id': np.array([1, 2, 3, 4], dtype=np.int64),
+        'location_id': ['L1', 'L1', 'L2', 'L1'],
+        'description': ['a', 'b', 'c', 'd'],
+        'transaction_date': [date(2024, 1, day) for day in (1, 2, 1, 3)],
+        'unit_cost': [1.25, 2.5, 0.1, 3.0],
+    })
+
+    compact = compact_frame(df)
+
+    assert compact['inventory_id'].dtype == np.int8
+    assert isinstance(compact['location_id'].dtype, pd.CategoricalDtype)
+    assert compact['description'].dtype == object
+    assert compact['transaction_date'].dtype == 'datetime64[ns]'
+    assert compact['unit_cost_cents'].tolist() == [125, 250, 10, 300]
+    assert decimal_values(compact, 'unit_cost').tolist() == df['unit_cost'].tolist()
+
+
+def test_compact_frame_keeps_inexact_or_null_decimals():
+    assert 'unit_cost' in compact_frame(pd.DataFrame({'unit_cost': [1.005, 2.0]})).columns
+    assert 'unit_cost' in compact_frame(pd.DataFrame({'unit_cost': [1.5, None]})).columns
+
+
+def test_compact_frame_keeps_empty_frames():
+    df = pd.DataFrame({'inventory_id': pd.Series([], dtype=np.int64), 'product_id': pd.Series([], dtype=object)})
+
+    assert compact_frame(df).columns.tolist() == ['inventory_id', 'product_id']
@@ -0,0 +1,40 @@
+import pandas as pd
+
+from loading import COPY_BUFFER_SIZE, _csv_bytes, _CSVStream, _to_csv
+
+
+def frame(rows):
+    return pd.DataFrame({
+        'inventory_id': range(rows),
+        'product_id': [f"P{row}" for row in range(rows)],
+        'note': ['con, coma' if row % 3 == 0 else None for row in range(rows)],
+    })
+
+
+def test_csv_stream_yields_the_whole_frame_in_small_reads():
+    df = frame(25)
+    stream = _CSVStream(df, batch_rows=4)
+
+    chunks = []
+    while chunk := stream.read(7):
+        chunks.append(chunk)
+
+    assert all(len(chunk) <= 7 for chunk in chunks)
+    assert b''.join(chunks) == _to_csv(df)
+    assert stream.bytes_read == len(_to_csv(df))
+
+
+def test_csv_stream_read_all():
+    df = frame(10)
+
+    assert _CSVStream(df, batch_rows=3).read() == _to_csv(df)
+
+
+def test_csv_stream_empty_frame():
+    assert _CSVStream(frame(0)).read(COPY_BUFFER_SIZE) == b''
+
+
+def test_csv_bytes_matches_copy_stream():
+    df = frame(100)
+
+    assert _csv_bytes(df) == len(_to_csv(df))
@@ -0,0 +1,35 @@
+import numpy as np
+
+from script1 import FEISTEL_ROUNDS, _feistel_permutation
+
+
+def keys(seed):
+    # Como en generate_inventory
+    return np.random.default_rng(seed).integers(0, 2**32, FEISTEL_ROUNDS, dtype=np.uint64)
+
+
+def test_feistel_permutation_is_a_permutation():
+    for size in (1, 2, 1000, 1001, 4097):
+        permuted = _feistel_permutation(size, keys(1))(np.arange(size, dtype=np.uint64))
+
+        assert sorted(permuted.tolist()) == list(range(size))
+
+
+def test_feistel_permutation_depends_only_on_keys():
+    values = np.arange(500, dtype=np.uint64)
+
+    first = _feistel_permutation(500, keys(1))(values.copy())
+
+    assert first.tolist() == _feistel_permutation(500, keys(1))(values.copy()).tolist()
+    assert first.tolist() != _feistel_permutation(500, keys(2))(values.copy()).tolist()
+    assert first.tolist() != values.tolist()
+
+
+def test_feistel_permutation_maps_ranges_consistently():
+    permute = _feistel_permutation(1000, keys(3))
+
+    # Generar por bloques da lo mismo que de una vez
+    whole = permute(np.arange(1000, dtype=np.uint64))
+    parts = np.concatenate([permute(np.arange(start, start + 250, dtype=np.uint64))
+                            for start in range(0, 1000, 250)])
+    assert whole.tolist() == parts.tolist()
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+from surrogate_keys import SurrogateKeyMap
+
+
+def key_map():
+    return SurrogateKeyMap('dim_product', 'product_id', 'product_key', ['P1', 'P2'], [10, 11], max_key=15)
+
+
+def test_lookup_resolves_known_ids_and_marks_unknown():
+    assert key_map().lookup(['P2', 'P9', 'P1']).tolist() == [11, -1, 10]
+
+
+def test_lookup_categorical_resolves_categories_once():
+    ids = pd.Series(pd.Categorical(['P1', 'P2', 'P1', 'P9']))
+
+    assert key_map().lookup(ids).tolist() == [10, 11, 10, -1]
+
+
+def test_assign_continues_after_expired_versions():
+    keys = key_map()
+
+    # max_key incluye versiones expiradas: las claves nuevas empiezan después
+    assert keys.assign(['P1', 'P3', 'P3', 'P4']).tolist() == [10, 16, 16, 17]
+    assert len(keys) == 4
+    assert keys.next_key == 18
+
+
+def test_update_replaces_current_key():
+    keys = key_map()
+
+    keys.update(['P1', 'P5'], np.array([20, 21]))
+
+    assert keys.lookup(['P1', 'P2', 'P5']).tolist() == [20, 11, 21]
+    assert keys.max_key == 21
@@ -0,0 +1,83 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from surrogate_keys import SurrogateKeyMap
+from transforms import DUPLICATE_GRAIN, build_fact_frame, build_fact_frame_parallel, partition_labels
+
+
+def inventory(**columns):
+    rows = len(next(iter(columns.values())))
+    defaults = {
+        'inventory_id': np.arange(1, rows + 1),
+        'product_id': ['P1'] * rows,
+        'location_id': ['L1'] * rows,
+        'supplier_id': ['S1'] * rows,
+        'transaction_date': [date(2024, 1, 1)] * rows,
+        'quantity_on_hand': [1] * rows,
+        'unit_cost': [2.5] * rows,
+        'minimum_stock': [0] * rows,
+        'maximum_stock': [10] * rows,
+        'reorder_point': [5] * rows,
+        'units_sold': [0] * rows,
+        'units_received': [0] * rows,
+    }
+    return pd.DataFrame({**defaults, **columns})
+
+
+def key_maps():
+    return {
+        'product_id': SurrogateKeyMap('dim_product', 'product_id', 'product_key', ['P1'], [1]),
+        'location_id': SurrogateKeyMap('dim_location', 'location_id', 'location_key', ['L1', 'L2'], [1, 2]),
+        'supplier_id': SurrogateKeyMap('dim_supplier', 'supplier_id', 'supplier_key', ['S1'], [1]),
+    }
+
+
+def test_partition_labels_by_location():
+    labels = partition_labels(inventory(location_id=['L1', 'L2', 'L1', 'L3']), 'location_id', 2)
+
+    assert labels.tolist() == [0, 1, 0, 0]
+
+
+def test_partition_labels_by_date_are_contiguous():
+    dates = [date(2024, 1, day) for day in (4, 1, 3, 2)]
+
+    labels = partition_labels(inventory(transaction_date=dates), 'transaction_date', 2)
+
+    assert labels.tolist() == [1, 0, 1, 0]
+
+
+def test_partition_labels_single_date_go_to_one_partition():
+    labels = partition_labels(inventory(transaction_date=[date(2024, 1, 1)] * 3), 'transaction_date', 4)
+
+    assert labels.dtype == np.int64
+    assert labels.tolist() == [0, 0, 0]
+
+
+def test_partition_labels_rejects_unknown_criterion():
+    with pytest.raises(ValueError):
+        partition_labels(inventory(location_id=['L1']), 'supplier_id', 2)
+
+
+def test_build_fact_frame_keeps_last_record_of_a_grain():
+    df = inventory(inventory_id=[7, 3, 5], location_id=['L1', 'L1', 'L9'], quantity_on_hand=[70, 30, 50])
+
+    facts, missing_keys = build_fact_frame(df, key_maps())
+
+    assert facts['inventory_id'].tolist() == [7]
+    assert facts['quantity_on_hand'].tolist() == [70]
+    assert facts['total_value'].tolist() == [175.0]
+    assert missing_keys.to_dict() == {1: DUPLICATE_GRAIN, 2: 'location_id'}
+
+
+def test_build_fact_frame_parallel_matches_single_process():
+    df = inventory(inventory_id=[1, 2, 3, 4], location_id=['L1', 'L2', 'L9', 'L1'],
+                   transaction_date=[date(2024, 1, day) for day in (1, 1, 2, 1)])
+
+    facts, missing_keys = build_fact_frame_parallel(df, key_maps(), 2)
+    expected_facts, expected_missing = build_fact_frame(df, key_maps())
+
+    pd.testing.assert_frame_equal(facts, expected_facts)
+    pd.testing.assert_series_equal(missing_keys, expected_missing)
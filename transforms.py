@@ -0,0 +1,184 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from compaction import decimal_values, source_column
+
+# Columnas de source_inventory que usa la transformación de hechos
+FACT_SOURCE_COLUMNS = [
+    'inventory_id', 'product_id', 'location_id', 'supplier_id', 'transaction_date',
+    'quantity_on_hand', 'unit_cost', 'minimum_stock', 'maximum_stock',
+    'reorder_point', 'units_sold', 'units_received'
+]
+
+# Grano de fact_inventory (fact_inventory_grain_idx) y motivo de rechazo de los
+# registros fuente que repiten un grano con un inventory_id menor
+GRAIN_COLUMNS = ['product_key', 'location_key', 'date_key', 'supplier_key']
+DUPLICATE_GRAIN = 'duplicate_grain'
+
+# Mapas de claves de cada proceso trabajador, recibidos una sola vez al iniciarlo
+_worker_key_maps = None
+
+
+def date_keys(dates):
+    """
+    Calcula date_key (YYYYMMDD) como year*10000 + month*100 + day con aritmética
+    entera sobre datetime64, sin formatear ni volver a parsear cadenas
+    """
+    # pd.to_datetime convierte objetos date en bloque; np.asarray lo haría uno a uno
+    days = np.asarray(pd.to_datetime(dates), dtype='datetime64[D]')
+    months = days.astype('datetime64[M]')
+    years = months.astype('datetime64[Y]')
+
+    year = years.astype(np.int64) + 1970
+    month = (months - years).astype(np.int64) + 1
+    day = (days - months).astype(np.int64) + 1
+    return year * 10000 + month * 100 + day
+
+
+def resolve_keys(inventory_df, key_maps):
+    """
+    Resuelve en una pasada por columna las claves subrogadas de los IDs naturales
+    del inventario con los mapas de claves. Devuelve las claves por columna de
+    clave, la máscara de filas con todas sus claves y, para el resto, las
+    columnas de ID que no se resolvieron (Series missing_keys)
+    """
+    keys = {
+        key_map.key_column: key_map.lookup(inventory_df[id_column])
+        for id_column, key_map in key_maps.items()
+    }
+    missing = {id_column: keys[key_map.key_column] < 0 for id_column, key_map in key_maps.items()}
+    matched = ~np.logical_or.reduce(list(missing.values()))
+
+    unmatched = np.flatnonzero(~matched)
+    reasons = [
+        ','.join(id_column for id_column, column_missing in missing.items() if column_missing[position])
+        for position in unmatched
+    ]
+    missing_keys = pd.Series(reasons, index=inventory_df.index[unmatched], dtype=object, name='missing_keys')
+    return keys, matched, missing_keys
+
+
+def build_fact_frame(inventory_df, key_maps):
+    """
+    Construye los registros de fact_inventory de un bloque de source_inventory,
+    resolviendo las claves subrogadas con los mapas de claves de las dimensiones.
+    Si varios registros caen en el mismo grano solo se carga el de mayor
+    inventory_id. Devuelve los hechos y missing_keys de los registros que no se
+    cargan: las columnas de ID sin clave en alguna dimensión o DUPLICATE_GRAIN
+    """
+    source_index = inventory_df.index
+    keys, matched, missing_keys = resolve_keys(inventory_df, key_maps)
+    inventory_df = inventory_df[matched]
+    # unit_cost puede venir en punto fijo si el inventario se compactó
+    quantity_on_hand = inventory_df['quantity_on_hand'].to_numpy()
+    unit_cost = decimal_values(inventory_df, 'unit_cost')
+
+    # Seleccionar, renombrar columnas y calcular total_value
+    fact_inventory = pd.DataFrame(index=inventory_df.index, data={
+        'inventory_id': inventory_df['inventory_id'].to_numpy(),
+        'product_key': keys['product_key'][matched],
+        'location_key': keys['location_key'][matched],
+        'date_key': date_keys(inventory_df['transaction_date']),
+        'supplier_key': keys['supplier_key'][matched],
+        'quantity_on_hand': quantity_on_hand,
+        'unit_cost': unit_cost,
+        'total_value': quantity_on_hand * unit_cost,
+        'minimum_stock_level': inventory_df['minimum_stock'].to_numpy(),
+        'maximum_stock_level': inventory_df['maximum_stock'].to_numpy(),
+        'reorder_point': inventory_df['reorder_point'].to_numpy(),
+        'units_sold': inventory_df['units_sold'].to_numpy(),
+        'units_received': inventory_df['units_received'].to_numpy(),
+    })
+
+    # Un grano repetido violaría fact_inventory_grain_idx: gana el último registro
+    order = np.argsort(inventory_df['inventory_id'].to_numpy(), kind='stable')
+    superseded = np.empty(len(order), dtype=bool)
+    superseded[order] = fact_inventory.iloc[order].duplicated(GRAIN_COLUMNS, keep='last').to_numpy()
+    if superseded.any():
+        duplicates = pd.Series(DUPLICATE_GRAIN, index=fact_inventory.index[superseded],
+                               dtype=object, name='missing_keys')
+        rejected = pd.concat([missing_keys, duplicates])
+        missing_keys = rejected.reindex(source_index[source_index.isin(rejected.index)])
+        fact_inventory = fact_inventory[~superseded]
+    return fact_inventory, missing_keys
+
+
+def partition_labels(inventory_df, partition_by, partitions):
+    """
+    Asigna cada registro de inventario a una partición, por location_id o por
+    rangos contiguos de transaction_date con un número similar de registros. Si
+    todos los registros tienen la misma fecha (un lote diario) qcut no encuentra
+    cortes y devuelve NaN: entonces van todos a una sola partición
+    """
+    if partition_by == 'location_id':
+        codes, _ = pd.factorize(inventory_df['location_id'])
+        return codes % partitions
+    if partition_by == 'transaction_date':
+        keys = date_keys(inventory_df['transaction_date'])
+        labels = pd.qcut(keys, partitions, labels=False, duplicates='drop')
+        if np.isnan(labels).any():
+            return np.zeros(len(keys), dtype=np.int64)
+        return labels.astype(np.int64)
+    raise ValueError(f"Criterio de partición desconocido: {partition_by}")
+
+
+def _transfer_frame(inventory_df):
+    """
+    Reduce el inventario a las columnas necesarias en tipos compactos (categorías
+    y datetime64), que se serializan hacia los procesos mucho más rápido que objetos
+    """
+    frame = inventory_df[[source_column(inventory_df, column) for column in FACT_SOURCE_COLUMNS]]
+    converted = {
+        column: frame[column].astype('category')
+        for column in ['product_id', 'location_id', 'supplier_id']
+        if frame[column].dtype == object
+    }
+    if frame['transaction_date'].dtype == object:
+        converted['transaction_date'] = pd.to_datetime(frame['transaction_date'])
+    return frame.assign(**converted)
+
+
+def _init_worker(key_maps):
+    global _worker_key_maps
+    _worker_key_maps = key_maps
+
+
+def _build_partition(partition):
+    positions, inventory_df = partition
+    inventory_df.index = positions
+    return build_fact_frame(inventory_df, _worker_key_maps)
+
+
+def build_fact_frame_parallel(inventory_df, key_maps, workers, partition_by='location_id'):
+    """
+    Ejecuta build_fact_frame en un ProcessPoolExecutor sobre particiones del
+    inventario. Los mapas de claves se envían una vez a cada proceso y el
+    resultado se reordena por posición original, idéntico al de un solo proceso
+    """
+    if workers <= 1 or len(inventory_df) == 0:
+        return build_fact_frame(inventory_df, key_maps)
+
+    frame = _transfer_frame(inventory_df)
+    labels = partition_labels(frame, partition_by, workers)
+    partitions = []
+    for label in np.unique(labels):
+        positions = np.flatnonzero(labels == label)
+        partitions.append((positions, frame.iloc[positions]))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(key_maps,)) as executor:
+        results = list(executor.map(_build_partition, partitions))
+
+    fact_inventory = pd.concat([facts for facts, _ in results]).sort_index()
+    fact_inventory.index = inventory_df.index[fact_inventory.index]
+    missing_keys = pd.concat([missing for _, missing in results]).sort_index()
+    missing_keys.index = inventory_df.index[missing_keys.index]
+    # Cada registro termina como hecho o como rechazo: ninguna partición se pierde
+    if len(fact_inventory) + len(missing_keys) != len(inventory_df):
+        raise RuntimeError(
+            f"La transformación en paralelo devolvió {len(fact_inventory)} hechos y "
+            f"{len(missing_keys)} rechazos para {len(inventory_df)} registros de inventario"
+        )
+    return fact_inventory, missing_keys
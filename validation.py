@@ -0,0 +1,72 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from sqlalchemy import text
+
+# Dimensiones del warehouse y su clave subrogada en fact_inventory
+DIMENSION_TABLES = {
+    'dim_product': 'product_key',
+    'dim_location': 'location_key',
+    'dim_supplier': 'supplier_key',
+    'dim_date': 'date_key',
+}
+
+# Un solo recorrido de fact_inventory: filas y hechos huérfanos de cada clave,
+# con las dimensiones unidas por hash
+FACT_CHECK_QUERY = (
+    "SELECT COUNT(*) AS fact_inventory, "
+    + ", ".join(f"COUNT(*) FILTER (WHERE {table}.{key} IS NULL) AS {key}"
+                for table, key in DIMENSION_TABLES.items())
+    + " FROM fact_inventory f "
+    + " ".join(f"LEFT JOIN {table} ON {table}.{key} = f.{key}"
+               for table, key in DIMENSION_TABLES.items())
+)
+
+# Filas de cada dimensión en una sola consulta
+DIMENSION_COUNT_QUERY = "SELECT " + ", ".join(
+    f"(SELECT COUNT(*) FROM {table}) AS {table}" for table in DIMENSION_TABLES
+)
+
+
+@dataclass
+class ValidationResult:
+    """
+    Resultado de validar el warehouse: filas por tabla y hechos huérfanos por
+    clave de dimensión
+    """
+    counts: dict
+    orphans: dict
+    seconds: float
+
+    @property
+    def referential_integrity(self):
+        return not any(self.orphans.values())
+
+    def summary(self):
+        lines = [f"{table}: {rows} filas" for table, rows in self.counts.items()]
+        lines += [f"hechos con {key} huérfana: {rows}" for key, rows in self.orphans.items() if rows]
+        return '\n'.join(lines)
+
+
+def validate_warehouse(engine):
+    """
+    Calcula los conteos y la integridad referencial de las cuatro claves de
+    dimensión con dos consultas agregadas que se ejecutan a la vez, cada una en
+    su conexión: el recorrido de fact_inventory y los conteos de las dimensiones
+    """
+    def run(query):
+        with engine.connect() as conn:
+            return dict(conn.execute(text(query)).mappings().one())
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        facts = executor.submit(run, FACT_CHECK_QUERY)
+        dimensions = executor.submit(run, DIMENSION_COUNT_QUERY)
+        fact_row, dimension_row = facts.result(), dimensions.result()
+
+    return ValidationResult(
+        counts={**dimension_row, 'fact_inventory': fact_row.pop('fact_inventory')},
+        orphans=fact_row,
+        seconds=time.perf_counter() - start,
+    )